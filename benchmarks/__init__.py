@@ -0,0 +1,7 @@
+"""Scaling benchmarks of the reasoner over synthetic EL ontologies.
+
+The ontologies are built straight into a `TermTable`, which stands in
+for the gateway, so no JVM is needed to run them:
+
+    $ python3 -m benchmarks.harness --families chain cycles --sizes 100 200 400
+"""
@@ -0,0 +1,169 @@
+"""
+Synthetic EL ontologies of a given size, one family per shape that
+stresses a different part of the reasoner:
+
+    - chain: long told chains A0 ⊑ A1 ⊑ ... ⊑ An (⊑-rule, told closure)
+    - conjunctions: wide conjunctions over a shared pool of names (⊓-rules)
+    - existentials: deeply nested ∃r.∃r. ... .C and long successor chains
+    (∃-rules)
+    - cycles: told cycles and cyclic definitions X ≡ B ⊓ ∃r.X
+    - equivalences: many classes of equivalent names linked to each other
+    - mixed: random axioms over random expressions, from a seed
+
+Expressions are the nested tuples of `utils.owl`, interned the same way
+as the ones read from a file, so conjunctions come out binarized.
+"""
+
+import random
+from typing import Callable, Dict
+
+from utils.owl import Expression, intern_expression
+from utils.terms import TermTable
+
+
+def name(prefix: str, *indices: int) -> Expression:
+    return ("name", "_".join((prefix, *(str(i) for i in indices))))
+
+
+def some(role: str, expression: Expression) -> Expression:
+    return ("some", role, expression)
+
+
+def conjunction(*expressions: Expression) -> Expression:
+    return ("and", *expressions)
+
+
+def add_gci(terms: TermTable, lhs: Expression, rhs: Expression) -> None:
+    terms.add_gci(intern_expression(terms, lhs), intern_expression(terms, rhs))
+
+
+def add_equivalence(terms: TermTable, *expressions: Expression) -> None:
+    terms.add_equivalence(*(intern_expression(terms, e) for e in expressions))
+
+
+def chain(terms: TermTable, size: int, rng: random.Random) -> None:
+    for i in range(size):
+        add_gci(terms, name("Chain", i), name("Chain", i + 1))
+
+
+def conjunctions(
+    terms: TermTable,
+    size: int,
+    rng: random.Random,
+    width: int = 8,
+) -> None:
+    """`size` defined conjunctions of `width` names each, and a subclass
+    of all the conjuncts of each that is only subsumed through ⊓-rule 2
+    """
+    pool = [name("Part", i) for i in range(max(size, width))]
+
+    for i in range(size):
+        parts = rng.sample(pool, width)
+        add_equivalence(terms, name("Whole", i), conjunction(*parts))
+        for part in parts:
+            add_gci(terms, name("Sub", i), part)
+
+
+def existentials(terms: TermTable, size: int, rng: random.Random) -> None:
+    """Each `Step_i` has an r-successor `Step_i+1`, so `Step_i` gets
+    ∃r.∃r. ... .Goal nested `size - i` deep, which is what `Depth_size-i`
+    is defined as
+    """
+    add_gci(terms, name("Step", size), name("Goal"))
+
+    # interned one level at a time, nesting tuples this deep would
+    # go past the recursion limit of `intern_expression`
+    role = terms.add_role("r")
+    nested = intern_expression(terms, name("Goal"))
+    for depth in range(1, size + 1):
+        nested = terms.add_existential(role, nested)
+        terms.add_gci(nested, intern_expression(terms, name("Depth", depth)))
+
+    for i in range(size):
+        add_gci(terms, name("Step", i), some("r", name("Step", i + 1)))
+
+
+def cycles(
+    terms: TermTable,
+    size: int,
+    rng: random.Random,
+    length: int = 4,
+) -> None:
+    """Told cycles of `length` names, and a ring of `size` cyclic
+    definitions X_i ≡ B_i ⊓ ∃r.X_i+1
+    """
+    for c in range(max(size // length, 1)):
+        for i in range(length):
+            add_gci(terms, name("Cycle", c, i), name("Cycle", c, (i + 1) % length))
+
+    for i in range(size):
+        add_equivalence(
+            terms,
+            name("Loop", i),
+            conjunction(name("Base", i), some("r", name("Loop", (i + 1) % size))),
+        )
+
+
+def equivalences(
+    terms: TermTable,
+    size: int,
+    rng: random.Random,
+    arity: int = 3,
+) -> None:
+    """`size` classes of `arity` equivalent names, each class below a random
+    earlier one
+    """
+    for i in range(size):
+        add_equivalence(terms, *(name("Same", i, j) for j in range(arity)))
+        if i:
+            add_gci(terms, name("Same", i, 0), name("Same", rng.randrange(i), 1))
+
+
+def mixed(
+    terms: TermTable,
+    size: int,
+    rng: random.Random,
+    roles: int = 3,
+    depth: int = 3,
+) -> None:
+    """`size` random GCIs and `size // 10` random equivalences over `size`
+    names and `roles` roles, with expressions at most `depth` deep
+    """
+    names = [name("Mixed", i) for i in range(size)]
+
+    def expression(depth: int) -> Expression:
+        choice = rng.random() if depth else 0
+        if choice < 0.5:
+            return rng.choice(names)
+        if choice < 0.75:
+            return conjunction(
+                *(expression(depth - 1) for _ in range(rng.randint(2, 3)))
+            )
+        return some(f"r{rng.randrange(roles)}", expression(depth - 1))
+
+    for _ in range(size):
+        add_gci(terms, expression(depth), expression(depth))
+
+    for _ in range(size // 10):
+        add_equivalence(terms, rng.choice(names), expression(depth))
+
+
+FAMILIES: Dict[str, Callable[[TermTable, int, random.Random], None]] = {
+    "chain": chain,
+    "conjunctions": conjunctions,
+    "existentials": existentials,
+    "cycles": cycles,
+    "equivalences": equivalences,
+    "mixed": mixed,
+}
+
+
+def generate(family: str, size: int, seed: int = 0) -> TermTable:
+    """Term table of an ontology of `family`, the same one for the same
+    `size` and `seed`
+    """
+    assert family in FAMILIES, f"Unknown family {family}, try one of {list(FAMILIES)}"
+
+    terms = TermTable()
+    FAMILIES[family](terms, size, random.Random(seed))
+    return terms
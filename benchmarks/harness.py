@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Time the reasoner on synthetic ontologies of growing size.
+
+For every family and size, each operation runs on a fresh `ELReasoner`
+built over the generated `TermTable`, and is reported with its wall time,
+the peak of memory allocated by Python (through `tracemalloc`), the
+number of rule firings and what the model and cache take in the end
+(`ELReasoner.memory_usage`). Results are written as JSON.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from benchmarks.generator import FAMILIES, generate
+from utils.reasoner import ELReasoner, Strategy
+from utils.terms import TermId, TermTable
+
+Result = Dict[str, Any]
+
+
+def subsumption_queries(
+    reasoner: ELReasoner,
+    concepts: List[TermId],
+    queries: int,
+    rng: random.Random,
+) -> Callable[[], Any]:
+    pairs = [(rng.choice(concepts), rng.choice(concepts)) for _ in range(queries)]
+    return lambda: [reasoner.is_subsumed_by(*pair) for pair in pairs]
+
+
+def subsumers_queries(
+    reasoner: ELReasoner,
+    concepts: List[TermId],
+    queries: int,
+    rng: random.Random,
+) -> Callable[[], Any]:
+    sample = [rng.choice(concepts) for _ in range(queries)]
+    return lambda: [reasoner.get_subsumers(c, print_output=False) for c in sample]
+
+
+def classification(
+    reasoner: ELReasoner,
+    concepts: List[TermId],
+    queries: int,
+    rng: random.Random,
+    strategy: Strategy = Strategy.SATURATION,
+    workers: Optional[int] = None,
+) -> Callable[[], Any]:
+    return lambda: reasoner.classify(strategy=strategy, workers=workers)
+
+
+OPERATIONS = {
+    "is_subsumed_by": subsumption_queries,
+    "get_subsumers": subsumers_queries,
+    "classify": classification,
+}
+
+
+def measure(
+    run: Callable[[], Any],
+    memory: bool = True,
+) -> Dict[str, Optional[float]]:
+    if memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {"seconds": seconds, "peak_bytes": peak}
+
+
+def benchmark(
+    family: str,
+    size: int,
+    operation: str,
+    terms: TermTable,
+    queries: int = 20,
+    seed: int = 0,
+    naive: bool = False,
+    cache_size: Optional[int] = 4096,
+    memory: bool = True,
+    metrics: bool = False,
+    goal_directed: bool = False,
+    modules: bool = False,
+    strategy: str = Strategy.SATURATION.value,
+    workers: Optional[int] = None,
+) -> Result:
+    reasoner = ELReasoner(
+        terms,
+        naive=naive,
+        cache_size=cache_size,
+        metrics=metrics,
+        goal_directed=goal_directed,
+        modules=modules,
+    )
+    concepts = sorted(reasoner.concept_names)
+
+    options = {}
+    if operation == "classify":
+        options = {"strategy": Strategy(strategy), "workers": workers}
+    run = OPERATIONS[operation](
+        reasoner, concepts, queries, random.Random(seed), **options
+    )
+
+    result = {
+        "family": family,
+        "size": size,
+        "operation": operation,
+        "concepts": len(terms),
+        "concept_names": len(concepts),
+        "axioms": len(terms.gcis) + len(terms.equivalences),
+        "queries": queries if operation != "classify" else None,
+        "strategy": strategy if operation == "classify" else None,
+        **measure(run, memory=memory),
+        "firings": reasoner.firings,
+        "memory": reasoner.memory_usage(),
+    }
+    if metrics:
+        result["metrics"] = reasoner.get_metrics().to_dict()
+
+    return result
+
+
+def run_benchmarks(
+    families: Sequence[str],
+    sizes: Sequence[int],
+    operations: Sequence[str],
+    queries: int = 20,
+    seed: int = 0,
+    naive: bool = False,
+    cache_size: Optional[int] = 4096,
+    memory: bool = True,
+    metrics: bool = False,
+    goal_directed: bool = False,
+    modules: bool = False,
+    strategy: str = Strategy.SATURATION.value,
+    workers: Optional[int] = None,
+) -> List[Result]:
+    results = []
+    for family in families:
+        for size in sizes:
+            terms = generate(family, size, seed)
+            for operation in operations:
+                result = benchmark(
+                    family,
+                    size,
+                    operation,
+                    terms,
+                    queries=queries,
+                    seed=seed,
+                    naive=naive,
+                    cache_size=cache_size,
+                    memory=memory,
+                    metrics=metrics,
+                    goal_directed=goal_directed,
+                    modules=modules,
+                    strategy=strategy,
+                    workers=workers,
+                )
+                print(
+                    f"{family:<13} {size:>6} {operation:<15}"
+                    f" {result['seconds']:>9.3f}s {result['firings']:>10} firings",
+                    file=sys.stderr,
+                )
+                results.append(result)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Scaling benchmarks over synthetic EL ontologies"
+    )
+    parser.add_argument(
+        "--families", nargs="+", choices=list(FAMILIES), default=list(FAMILIES)
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=[50, 100, 200])
+    parser.add_argument(
+        "--operations", nargs="+", choices=list(OPERATIONS), default=list(OPERATIONS)
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=20,
+        help="Queries per size for is_subsumed_by and get_subsumers",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--naive", action="store_true")
+    parser.add_argument(
+        "--cache-size", type=int, default=4096, help="0 disables the cache"
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Don't trace memory, which slows down the runs",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Profile each completion rule, which slows down the runs",
+    )
+    parser.add_argument(
+        "--goal-directed",
+        action="store_true",
+        help="Stop is_subsumed_by queries as soon as the subsumer is derived",
+    )
+    parser.add_argument(
+        "--modules",
+        action="store_true",
+        help="Restrict each query to the module of its signature",
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=[strategy.value for strategy in Strategy],
+        default=Strategy.SATURATION.value,
+        help="How classify computes the hierarchy",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes of the parallel strategy, all the cores by default",
+    )
+    parser.add_argument("--output", help="Write the results there instead of stdout")
+    args = parser.parse_args()
+
+    # the reasoner logs at INFO, keep it out of the timings as much as possible
+    logging.basicConfig(level=logging.WARNING)
+
+    results = run_benchmarks(
+        args.families,
+        args.sizes,
+        args.operations,
+        queries=args.queries,
+        seed=args.seed,
+        naive=args.naive,
+        cache_size=args.cache_size,
+        memory=not args.no_memory,
+        metrics=args.metrics,
+        goal_directed=args.goal_directed,
+        modules=args.modules,
+        strategy=args.strategy,
+        workers=args.workers,
+    )
+
+    report = {
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "naive": args.naive,
+        "cache_size": args.cache_size,
+        "goal_directed": args.goal_directed,
+        "modules": args.modules,
+        "strategy": args.strategy,
+        "workers": args.workers,
+        "results": results,
+    }
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
@@ -1,32 +1,304 @@
 #!/usr/bin/env python3
 
+import argparse
+import contextlib
 import logging
+import os
 import sys
+from typing import Any, Callable, Iterable, List, Optional
 
-from utils import gateway
-from utils.reasoner import ELReasoner
+from utils import get_gateway
+from utils.batch import FORMATS, read_classes, write_subsumers
+from utils.owl import NotOWLXML, load_owx
+from utils.reasoner import ELReasoner, invalid_class_name
+from utils.store import HierarchyFile, InvalidHierarchyFile, fingerprint
+from utils.trace import Category, Tracer
 
 
-def main(file_name: str, class_name: str) -> None:
-    log_level = logging.INFO
-    logging.basicConfig(
-        filename="dl-reasoning.log", filemode="w", encoding="utf-8", level=log_level
-    )
-    logger = logging.getLogger(__name__)
+def load_ontology(file_name: str, use_gateway: bool, logger: logging.Logger) -> Any:
+    logger.info("Loading the ontology ...")
 
-    parser = gateway.getOWLParser()
+    if not use_gateway:
+        ontology = load_owx(file_name)
+        logger.info("Ontology loaded")
+        return ontology
 
-    logger.info("Loading the ontology ...")
+    gateway = get_gateway()
+    parser = gateway.getOWLParser()
     ontology = parser.parseFile(file_name)
     logger.info("Ontology loaded")
 
     logger.info("Converting to binary conjunctions ...")
     gateway.convertToBinaryConjunctions(ontology)
 
-    el_reasoner = ELReasoner(ontology)
+    return ontology
+
+
+def stream_subsumers(
+    class_names: Iterable[str],
+    lookup: Callable[[str], List[str]],
+    output_format: str,
+) -> None:
+    """Write the subsumers `lookup` gives for each class to stdout, each
+    as soon as it is there, see `utils.batch`. Classes it fails on (unknown
+    names, errors of the server) get an error instead.
+    """
+    for class_name in class_names:
+        try:
+            subsumers = lookup(class_name)
+        except (AssertionError, RuntimeError) as e:
+            write_subsumers(sys.stdout, output_format, class_name, error=str(e))
+        else:
+            write_subsumers(sys.stdout, output_format, class_name, subsumers)
+
+
+def main(
+    file_name: str,
+    class_name: Optional[str] = None,
+    use_gateway: bool = False,
+    naive: bool = False,
+    cache_dir: Optional[str] = None,
+    direct: bool = False,
+    metrics: bool = False,
+    metrics_json: Optional[str] = None,
+    verbose: bool = False,
+    trace: Optional[str] = None,
+    server: Optional[str] = None,
+    classes: Optional[Iterable[str]] = None,
+    all_classes: bool = False,
+    output_format: Optional[str] = None,
+) -> None:
+    """Print the subsumers of `class_name`, or with `output_format` (see
+    `utils.batch`) stream them for each class of `classes`, or of the
+    whole ontology with `all_classes`. Batch modes default to "jsonl".
+
+    Streamed subsumers are computed one class at a time and not kept,
+    unless the whole ontology has to be classified anyway (`direct`,
+    or a `cache_dir` without the hierarchy yet).
+    """
+    if classes is not None or all_classes:
+        output_format = output_format or "jsonl"
+    elif output_format is not None:
+        classes = [class_name]
+
+    if server is not None:
+        from server import query
+
+        def ask(class_name: str) -> List[str]:
+            request = {
+                "op": "subsumers",
+                "ontology": os.path.abspath(file_name),
+                "class": class_name,
+                "direct": direct,
+            }
+            return query(server, request)
+
+        if output_format is not None:
+            stream_subsumers(classes, ask, output_format)
+        else:
+            for subsumer in ask(class_name):
+                print(subsumer)
+        return
+
+    log_level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(
+        filename="dl-reasoning.log", filemode="w", encoding="utf-8", level=log_level
+    )
+    logger = logging.getLogger(__name__)
+
+    cache_path = None
+    if cache_dir is not None:
+        key = fingerprint(file_name, "gateway" if use_gateway else "owx")
+        cache_path = os.path.join(cache_dir, f"{key}.elh")
+
+        # metrics are only there when reasoning, not from the cache
+        profiled = metrics or metrics_json is not None
+        hierarchy = None
+        if os.path.exists(cache_path) and not direct and not profiled:
+            logger.info(f"Reading the hierarchy from {cache_path}")
+            try:
+                hierarchy = HierarchyFile(cache_path)
+            except InvalidHierarchyFile as e:
+                # e.g. truncated, it is written again below
+                logger.warning(f"{e}, classifying again")
+                os.remove(cache_path)
+
+        if hierarchy is not None:
+            if output_format is not None:
+                with hierarchy:
+
+                    def read(class_name: str) -> List[str]:
+                        subsumers = hierarchy.get_subsumers(class_name)
+                        assert subsumers is not None, invalid_class_name(class_name)
+                        return sorted(subsumers)
+
+                    if all_classes:
+                        classes = (hierarchy.name(i) for i in range(len(hierarchy)))
+                    stream_subsumers(classes, read, output_format)
+                return
 
-    el_reasoner.get_subsumers(class_name, print_output=True)
+            with hierarchy:
+                subsumers = hierarchy.get_subsumers(class_name)
+
+            # unknown classes go through the reasoner for the usual error
+            if subsumers is not None:
+                for subsumer in sorted(subsumers):
+                    print(subsumer)
+                return
+
+    ontology = load_ontology(file_name, use_gateway, logger)
+
+    tracer = None
+    if trace is not None:
+        tracer = Tracer(
+            Category.STATE | Category.DERIVATION,
+            path=trace,
+            ontology=fingerprint(file_name, "gateway" if use_gateway else "owx"),
+        )
+
+    el_reasoner = ELReasoner(
+        ontology,
+        naive=naive,
+        metrics=metrics or metrics_json is not None,
+        tracer=tracer,
+    )
+
+    if cache_path is not None and not os.path.exists(cache_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        el_reasoner.save_hierarchy(cache_path)
+
+    if output_format is not None:
+        if all_classes:
+            classes = sorted(
+                el_reasoner.terms.names[c] for c in el_reasoner.concept_names
+            )
+        stream_subsumers(
+            classes,
+            lambda class_name: sorted(
+                el_reasoner.terms.format_all(
+                    el_reasoner.subsumers_of(class_name, direct=direct)
+                )
+            ),
+            output_format,
+        )
+    else:
+        el_reasoner.get_subsumers(class_name, print_output=True, direct=direct)
+
+    if tracer is not None:
+        tracer.close()
+
+    if metrics:
+        for line in el_reasoner.get_metrics().summary():
+            print(line, file=sys.stderr)
+
+    if metrics_json is not None:
+        with open(metrics_json, "w", encoding="utf-8") as f:
+            f.write(el_reasoner.get_metrics().to_json())
 
 
 if __name__ == "__main__":
-    main(*sys.argv[1:])
+    parser = argparse.ArgumentParser(description="EL reasoner")
+    parser.add_argument("file_name", help="ontology file in OWL/XML syntax")
+    parser.add_argument(
+        "class_name", nargs="?", help="class to compute the subsumers of"
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="stream the subsumers of every class of the ontology instead",
+    )
+    parser.add_argument(
+        "--classes",
+        metavar="FILE",
+        help="stream the subsumers of the classes in this file instead, "
+        "one per line, `-` for stdin",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        help="output format, one flushed record per class "
+        "(default for --all and --classes: jsonl)",
+    )
+    parser.add_argument(
+        "--gateway",
+        action="store_true",
+        help="parse the ontology through the dl4python Java gateway",
+    )
+    parser.add_argument(
+        "--naive",
+        action="store_true",
+        help="apply the rules with the naive loop instead of the worklist",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="classify once and keep the hierarchy in this directory, "
+        "keyed by the contents of the ontology (not read with --metrics)",
+    )
+    parser.add_argument(
+        "--direct",
+        action="store_true",
+        help="only print the direct subsumers",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="print a summary of what each completion rule did to stderr",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        help="write what each completion rule did to this file as JSON",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="log the state of the models as well",
+    )
+    parser.add_argument(
+        "--trace",
+        help="record the derivations in this file, "
+        "to replay with `python3 -m utils.trace`",
+    )
+    parser.add_argument(
+        "--server",
+        help="ask a server started with `./server.py --socket SERVER` instead",
+    )
+    args = parser.parse_args()
+
+    if (args.class_name is not None) + args.all + (args.classes is not None) != 1:
+        parser.error("give exactly one of class_name, --all and --classes")
+    if args.all and args.server is not None:
+        parser.error("--all can't be used with --server")
+
+    with contextlib.ExitStack() as stack:
+        classes = None
+        if args.classes == "-":
+            classes = read_classes(sys.stdin)
+        elif args.classes is not None:
+            classes = read_classes(
+                stack.enter_context(open(args.classes, encoding="utf-8"))
+            )
+
+        try:
+            main(
+                args.file_name,
+                args.class_name,
+                use_gateway=args.gateway,
+                naive=args.naive,
+                cache_dir=args.cache_dir,
+                direct=args.direct,
+                metrics=args.metrics,
+                metrics_json=args.metrics_json,
+                verbose=args.verbose,
+                trace=args.trace,
+                server=args.server,
+                classes=classes,
+                all_classes=args.all,
+                output_format=args.format,
+            )
+        except NotOWLXML as e:
+            sys.exit(f"error: {e}")
+        except BrokenPipeError:
+            # the reader went away (e.g. `| head`), the rest would fail too
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            sys.exit(1)
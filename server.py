@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Resident reasoning server.
+
+Ontologies are loaded and classified once, on their first query, and
+kept warm: later queries are answered from the classified hierarchy.
+Requests are JSON objects, over a Unix socket (one per line, one
+response line each) or over HTTP (the query string of a GET):
+
+    {"op": "subsumers", "ontology": "dutch-pancakes.owx", "class": "ForestDish"}
+    {"op": "subsumers", ..., "direct": true}
+    {"op": "subsumed", "ontology": ..., "subsumee": "A", "subsumer": "B"}
+
+    GET /subsumers?ontology=dutch-pancakes.owx&class=ForestDish
+
+Responses are `{"result": ...}` or `{"error": ...}`. Identical requests
+in flight at the same time are answered once.
+
+Reasoners are not thread-safe, so all the reasoning runs in a single
+worker thread and the event loop only does the I/O.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from main import load_ontology
+from utils.reasoner import ELReasoner
+
+Request = Dict[str, Any]
+Response = Dict[str, Any]
+
+# an ontology file is loaded again once it changes
+OntologyKey = Tuple[str, int, int]
+
+
+class BadRequest(Exception):
+    pass
+
+
+class ReasonerServer:
+    """
+    - `reasoners` are the loaded (or loading) reasoners, keyed by path,
+    modification time and size of the ontology file
+    - `in_flight` are the requests being answered, keyed by their JSON
+    """
+
+    use_gateway: bool
+    naive: bool
+    reasoners: Dict[OntologyKey, "asyncio.Future[ELReasoner]"]
+    in_flight: Dict[str, "asyncio.Future[Any]"]
+
+    _executor: ThreadPoolExecutor
+
+    log: logging.Logger
+
+    def __init__(self, use_gateway: bool = False, naive: bool = False) -> None:
+        self.use_gateway = use_gateway
+        self.naive = naive
+        self.reasoners = {}
+        self.in_flight = {}
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+        self.log = logging.getLogger(__name__).getChild("ReasonerServer")
+
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, fn, *args
+        )
+
+    def _load(self, file_name: str) -> ELReasoner:
+        reasoner = ELReasoner(
+            load_ontology(file_name, self.use_gateway, self.log), naive=self.naive
+        )
+        reasoner.classify()
+        self.log.info(f"{file_name} classified")
+        return reasoner
+
+    async def get_reasoner(self, file_name: str) -> ELReasoner:
+        try:
+            stat = os.stat(file_name)
+        except OSError as e:
+            raise BadRequest(f"Can't read {file_name}: {e.strerror}")
+
+        key = (os.path.abspath(file_name), stat.st_mtime_ns, stat.st_size)
+        reasoner = self.reasoners.get(key)
+        if reasoner is None:
+            # older versions of the file are not needed anymore
+            for old in [k for k in self.reasoners if k[0] == key[0]]:
+                del self.reasoners[old]
+            reasoner = self.reasoners[key] = asyncio.ensure_future(
+                self._run(self._load, file_name)
+            )
+
+        try:
+            return await reasoner
+        except BaseException:
+            self.reasoners.pop(key, None)
+            raise
+
+    @staticmethod
+    def subsumers(reasoner: ELReasoner, class_name: str, direct: bool) -> List[str]:
+        concept = reasoner.validate_concept(class_name)
+        if direct:
+            subsumers = reasoner.get_taxonomy().direct_subsumers(concept)
+        else:
+            reasoner.get_subsumers(concept, print_output=False)
+            subsumers = reasoner.hierarchy[concept]
+        return sorted(reasoner.terms.format_all(subsumers))
+
+    @staticmethod
+    def subsumed(reasoner: ELReasoner, subsumee: str, subsumer: str) -> bool:
+        # unknown names are skipped by `check_subsumptions`, report them
+        reasoner.validate_concept(subsumee)
+        reasoner.validate_concept(subsumer)
+        # from the classified hierarchy, without building a model
+        [(_, _, result)] = reasoner.check_subsumptions([(subsumee, subsumer)])
+        return result
+
+    async def answer(self, request: Request) -> Any:
+        op = request.get("op")
+        if op not in ("subsumers", "subsumed"):
+            raise BadRequest(f"Unknown op {op!r}")
+
+        try:
+            reasoner = await self.get_reasoner(request["ontology"])
+            if op == "subsumers":
+                return await self._run(
+                    self.subsumers,
+                    reasoner,
+                    request["class"],
+                    bool(request.get("direct", False)),
+                )
+            return await self._run(
+                self.subsumed, reasoner, request["subsumee"], request["subsumer"]
+            )
+        except KeyError as e:
+            raise BadRequest(f"Missing {e.args[0]!r}")
+
+    async def handle(self, request: Request) -> Response:
+        """Answer `request`, or wait for the answer of the same request
+        if it is already in flight
+        """
+        key = json.dumps(request, sort_keys=True)
+        answer = self.in_flight.get(key)
+        if answer is None:
+            answer = self.in_flight[key] = asyncio.ensure_future(self.answer(request))
+            answer.add_done_callback(lambda _: self.in_flight.pop(key, None))
+
+        try:
+            # shielded, a client going away doesn't cancel it for the others
+            return {"result": await asyncio.shield(answer)}
+        except (BadRequest, AssertionError) as e:
+            return {"error": str(e)}
+        except Exception as e:
+            self.log.exception(f"Failed to answer {key}")
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    async def serve_unix(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("not an object")
+                except ValueError as e:
+                    response = {"error": f"Invalid request: {e}"}
+                else:
+                    response = await self.handle(request)
+
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve_http(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Just enough HTTP/1.0 for `GET /<op>?<fields>`"""
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            # headers are not needed
+            while (await reader.readline()).strip():
+                pass
+
+            if len(request_line) != 3 or request_line[0] != "GET":
+                status, response = "405 Method Not Allowed", {"error": "Only GET"}
+            else:
+                url = urlsplit(request_line[1])
+                request = dict(parse_qsl(url.query))
+                request["op"] = url.path.strip("/")
+                if "direct" in request:
+                    request["direct"] = request["direct"].lower() in ("1", "true")
+
+                response = await self.handle(request)
+                status = "400 Bad Request" if "error" in response else "200 OK"
+
+            body = json.dumps(response).encode("utf-8")
+            writer.write(
+                f"HTTP/1.0 {status}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def run(
+        self,
+        socket_path: Optional[str] = None,
+        http: Optional[Tuple[str, int]] = None,
+    ) -> None:
+        servers = []
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            servers.append(
+                await asyncio.start_unix_server(self.serve_unix, path=socket_path)
+            )
+            self.log.info(f"Listening on {socket_path}")
+        if http is not None:
+            servers.append(await asyncio.start_server(self.serve_http, *http))
+            self.log.info(f"Listening on http://{http[0]}:{http[1]}")
+
+        assert servers, "Nothing to listen on, give a socket path or an HTTP address"
+
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def query(socket_path: str, request: Request) -> Any:
+    """Send `request` to a server listening on `socket_path`"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with client.makefile("rb") as f:
+            response = json.loads(f.readline())
+
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response["result"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident EL reasoning server")
+    parser.add_argument("--socket", help="path of the Unix socket to listen on")
+    parser.add_argument("--http", help="HOST:PORT to listen on for HTTP")
+    parser.add_argument(
+        "--gateway",
+        action="store_true",
+        help="parse the ontologies through the dl4python Java gateway",
+    )
+    parser.add_argument(
+        "--naive",
+        action="store_true",
+        help="apply the rules with the naive loop instead of the worklist",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # per-query messages of the reasoners would flood the output
+    logging.getLogger("utils").setLevel(logging.WARNING)
+
+    http = None
+    if args.http is not None:
+        host, port = args.http.rsplit(":", 1)
+        http = (host, int(port))
+
+    server = ReasonerServer(use_gateway=args.gateway, naive=args.naive)
+    try:
+        asyncio.run(server.run(socket_path=args.socket, http=http))
+    except KeyboardInterrupt:
+        pass
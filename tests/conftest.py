@@ -0,0 +1,21 @@
+import os
+from typing import Callable
+
+import pytest
+
+from benchmarks.generator import FAMILIES, generate
+from utils.owl import load_owx
+from utils.terms import TermTable
+
+PANCAKES = os.path.join(os.path.dirname(__file__), os.pardir, "dutch-pancakes.owx")
+SIZE = 30
+
+
+@pytest.fixture(params=["dutch-pancakes", *FAMILIES])
+def ontology(request: pytest.FixtureRequest) -> Callable[[], TermTable]:
+    """Makes a new term table of the ontology each time it is called, so
+    tests can edit theirs
+    """
+    if request.param == "dutch-pancakes":
+        return lambda: load_owx(PANCAKES)
+    return lambda: generate(request.param, SIZE)
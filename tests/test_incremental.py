@@ -0,0 +1,67 @@
+import copy
+import random
+
+import pytest
+
+from utils.reasoner import ELReasoner
+
+STEPS = 20
+
+
+def hierarchy(reasoner):
+    return {c: reasoner.hierarchy[c] for c in reasoner.concept_names}
+
+
+def reclassify(reasoner):
+    """The hierarchy of a new reasoner on the TBox of `reasoner`"""
+    terms = copy.deepcopy(reasoner.terms)
+    terms.gcis = list(reasoner.tbox.gcis)
+    terms.equivalences = list(reasoner.tbox.equivalences)
+
+    fresh = ELReasoner(terms)
+    fresh.classify()
+    return hierarchy(fresh)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_edits_like_reclassification(ontology, seed):
+    rng = random.Random(seed)
+    reasoner = ELReasoner(ontology())
+    reasoner.classify()
+    names = sorted(reasoner.concept_names)
+    concepts = sorted(reasoner.concepts)
+
+    for _ in range(STEPS):
+        edit = rng.random()
+        if edit < 0.4:
+            gci = (rng.choice(concepts), rng.choice(names))
+            reasoner.add_axioms(gcis=[gci])
+        elif edit < 0.5:
+            equivalence = (rng.choice(names), rng.choice(concepts))
+            reasoner.add_axioms(equivalences=[equivalence])
+        elif edit < 0.9 and reasoner.tbox.gcis:
+            gci = rng.choice(sorted(reasoner.tbox.gcis))
+            reasoner.remove_axioms(gcis=[gci])
+        elif reasoner.tbox.equivalences:
+            equivalence = rng.choice(sorted(reasoner.tbox.equivalences))
+            reasoner.remove_axioms(equivalences=[equivalence])
+
+        assert hierarchy(reasoner) == reclassify(reasoner)
+
+
+def test_remove_added_axiom(ontology):
+    reasoner = ELReasoner(ontology())
+    reasoner.classify()
+    expected = hierarchy(reasoner)
+    subsumee, subsumer = next(
+        (A, B)
+        for A in sorted(expected)
+        for B in sorted(expected)
+        if B not in expected[A]
+    )
+
+    reasoner.add_axioms(gcis=[(subsumee, subsumer)])
+    assert subsumer in reasoner.hierarchy[subsumee]
+
+    reasoner.remove_axioms(gcis=[(subsumee, subsumer)])
+    assert hierarchy(reasoner) == expected
@@ -0,0 +1,16 @@
+import pytest
+
+from utils.reasoner import ELReasoner, Strategy
+
+
+def classify(terms, strategy=Strategy.SATURATION, **kwargs):
+    reasoner = ELReasoner(terms, **kwargs)
+    reasoner.classify(strategy, workers=2)
+    return {c: reasoner.hierarchy[c] for c in reasoner.concept_names}
+
+
+@pytest.mark.parametrize("strategy", list(Strategy))
+def test_worklist_classifies_like_naive(ontology, strategy):
+    expected = classify(ontology(), Strategy.PER_CONCEPT, naive=True)
+
+    assert classify(ontology(), strategy) == expected
@@ -0,0 +1,108 @@
+import pytest
+
+from utils.models import ConceptType
+from utils.owl import NotOWLXML, load_owx
+from utils.reasoner import ELReasoner
+from utils.terms import TOP
+
+from tests.conftest import PANCAKES
+
+ONTOLOGY = """<?xml version="1.0"?>
+<Ontology xmlns="http://www.w3.org/2002/07/owl#" ontologyIRI="http://x">
+  <Prefix name="owl" IRI="http://www.w3.org/2002/07/owl#"/>
+  <Declaration><Class IRI="#Declared"/></Declaration>
+  <SubClassOf><Class IRI="#A"/><Class IRI="#B"/></SubClassOf>
+  <SubClassOf>
+    <Class abbreviatedIRI="owl:Thing"/>
+    <ObjectSomeValuesFrom>
+      <ObjectProperty IRI="#r"/>
+      <Class IRI="http://www.w3.org/2002/07/owl#Thing"/>
+    </ObjectSomeValuesFrom>
+  </SubClassOf>
+  <EquivalentClasses>
+    <Class IRI="#C"/>
+    <ObjectIntersectionOf>
+      <Class IRI="#A"/><Class IRI="#B"/><Class IRI="#D"/>
+    </ObjectIntersectionOf>
+  </EquivalentClasses>
+  <SubClassOf>
+    <Annotation><AnnotationProperty IRI="#note"/><Literal>kept</Literal></Annotation>
+    <Class IRI="#D"/><Class IRI="#B"/>
+  </SubClassOf>
+  <SubClassOf>
+    <Class IRI="#A"/>
+    <ObjectUnionOf><Class IRI="#C"/><Class IRI="#InUnion"/></ObjectUnionOf>
+  </SubClassOf>
+  <SubClassOf>
+    <Class IRI="#A"/>
+    <ObjectAllValuesFrom>
+      <ObjectProperty IRI="#r"/><Class IRI="#D"/>
+    </ObjectAllValuesFrom>
+  </SubClassOf>
+  <DisjointClasses><Class IRI="#B"/><Class IRI="#Disjoint"/></DisjointClasses>
+</Ontology>
+"""
+
+
+@pytest.fixture
+def terms(tmp_path):
+    path = tmp_path / "ontology.owx"
+    path.write_text(ONTOLOGY)
+    return load_owx(str(path))
+
+
+def test_skips_axioms_not_in_el(terms):
+    gcis = {(terms.format(lhs), terms.format(rhs)) for lhs, rhs in terms.gcis}
+
+    assert gcis == {("A", "B"), ("⊤", "∃r.⊤"), ("D", "B")}
+    assert len(terms.equivalences) == 1
+
+
+def test_keeps_classes_of_skipped_axioms(terms):
+    names = {terms.names[c] for c in terms.concept_names}
+    assert names == {"Declared", "A", "B", "C", "D", "InUnion", "Disjoint"}
+
+    reasoner = ELReasoner(terms)
+    reasoner.classify()
+    in_union = terms.get_name("InUnion")
+    assert reasoner.hierarchy[in_union] == {in_union}
+
+
+def test_maps_thing_to_top(terms):
+    (lhs, rhs), *_ = (gci for gci in terms.gcis if terms.format(gci[0]) == "⊤")
+
+    assert lhs == TOP
+    assert terms.kinds[rhs] is ConceptType.EXISTENTIAL
+    assert terms.fillers[rhs] == TOP
+    assert "Thing" not in terms.names
+
+
+def test_binarizes_conjunctions(terms):
+    (C, conjunction), *_ = terms.equivalences
+
+    assert terms.format(C) == "C"
+    assert len(terms.conjuncts[conjunction]) == 2
+    assert ELReasoner(terms).is_subsumed_by("C", "D")
+
+
+def test_dutch_pancakes():
+    reasoner = ELReasoner(load_owx(PANCAKES))
+
+    assert reasoner.is_subsumed_by("ForestDish", "PancakeDish")
+    assert not reasoner.is_subsumed_by("PancakeDish", "ForestDish")
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        '<?xml version="1.0"?>\n<rdf:RDF '
+        'xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"/>\n',
+        "Ontology(<http://x>\nSubClassOf(:A :B)\n)\n",
+    ],
+)
+def test_not_owl_xml(tmp_path, content):
+    path = tmp_path / "ontology.owl"
+    path.write_text(content)
+
+    with pytest.raises(NotOWLXML):
+        load_owx(str(path))
@@ -0,0 +1,82 @@
+import sys
+
+from benchmarks.generator import generate
+from utils.models import ConceptType
+from utils.owl import intern_expression
+from utils.reasoner import ELReasoner
+from utils.tbox import TBox
+from utils.terms import TermTable
+
+
+def is_normal_form(terms, lhs, rhs):
+    """A ⊑ B, A1 ⊓ A2 ⊑ B, A ⊑ ∃r.B or ∃r.A ⊑ B"""
+
+    def is_atom(concept):
+        return terms.kinds[concept] in (ConceptType.NAME, ConceptType.TOP)
+
+    def is_existential(concept):
+        return terms.kinds[concept] is ConceptType.EXISTENTIAL and is_atom(
+            terms.fillers[concept]
+        )
+
+    if is_atom(lhs):
+        return is_atom(rhs) or is_existential(rhs)
+    if terms.kinds[lhs] is ConceptType.CONJUNCTION:
+        return (
+            len(terms.conjuncts[lhs]) == 2
+            and all(map(is_atom, terms.conjuncts[lhs]))
+            and is_atom(rhs)
+        )
+    return is_existential(lhs) and is_atom(rhs)
+
+
+def test_normal_forms(ontology):
+    terms = ontology()
+    tbox = TBox(terms)
+
+    assert tbox.normalized
+    for lhs, rhs in tbox.normalized:
+        assert is_normal_form(terms, lhs, rhs), (terms.format(lhs), terms.format(rhs))
+
+
+def test_normalizing_again_gives_the_same_axioms(ontology):
+    terms = ontology()
+    normalized = TBox(terms).normalized
+
+    assert TBox(terms).normalized == normalized
+
+
+def test_nested_concepts():
+    terms = TermTable()
+    A, B, C, D, E, F, G = (("name", n) for n in "ABCDEFG")
+
+    def gci(lhs, rhs):
+        terms.add_gci(intern_expression(terms, lhs), intern_expression(terms, rhs))
+
+    gci(A, ("some", "r", ("some", "s", ("and", B, C))))
+    gci(("some", "r", ("some", "s", B)), D)
+    gci(("and", B, C, E), F)
+    gci(G, ("and", B, ("and", C, E)))
+    terms.add_equivalence(
+        intern_expression(terms, D), intern_expression(terms, ("and", E, G))
+    )
+
+    reasoner = ELReasoner(terms)
+    reasoner.classify()
+    subsumers = {
+        terms.names[c]: set(terms.format_all(reasoner.hierarchy[c]))
+        for c in reasoner.concept_names
+    }
+
+    assert subsumers["A"] == {"A", "D", "E", "G", "B", "C", "F"}
+    assert subsumers["G"] == {"G", "B", "C", "E", "F", "D"}
+    assert subsumers["B"] == {"B"}
+
+
+def test_deep_nesting_under_recursion_limit():
+    size = 2 * sys.getrecursionlimit()
+    terms = generate("existentials", size)
+
+    reasoner = ELReasoner(terms)
+
+    assert reasoner.is_subsumed_by("Step_0", f"Depth_{size}")
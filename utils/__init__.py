@@ -1,3 +1,16 @@
-from py4j.java_gateway import JavaGateway
+"""The dl4python gateway is only opened on first use, so
+ontologies loaded with `utils.owl` never need a running JVM
+"""
 
-gateway = JavaGateway()
+from typing import Any, Optional
+
+_gateway: Optional[Any] = None
+
+
+def get_gateway() -> Any:
+    global _gateway
+    if _gateway is None:
+        from py4j.java_gateway import JavaGateway
+
+        _gateway = JavaGateway()
+    return _gateway
@@ -0,0 +1,87 @@
+"""
+Helpers for checking many subsumptions, or many classes, at once.
+
+Pairs are grouped by subsumee, so each subsumee is saturated only once
+and all of its subsumers are checked against the same label.
+
+The subsumers of many classes are written out one class at a time, as
+soon as they are computed, so consumers can start on them right away:
+
+    jsonl   {"class": "A", "subsumers": ["A", "B"]}, one object per line,
+            or {"class": "A", "error": "..."} if `A` can't be answered
+
+    tsv     `A<TAB>B`, one line per subsumer, errors go to stderr
+"""
+
+import json
+import sys
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+Pair = Tuple[Hashable, Hashable]
+
+FORMATS = ("jsonl", "tsv")
+
+
+def read_pairs(file_name: str) -> Iterator[Tuple[str, str]]:
+    """Pairs of class names from a text file, one `subsumee subsumer`
+    pair per line separated by whitespace (e.g. a tab). Blank lines
+    and lines starting with `#` are skipped.
+    """
+    with open(file_name, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            fields = line.split()
+            if len(fields) != 2:
+                raise ValueError(
+                    f"{file_name}:{number}: expected a subsumee and a subsumer, "
+                    f"got {line!r}"
+                )
+            yield fields[0], fields[1]
+
+
+def group_by_subsumee(pairs: Iterable[Pair]) -> Dict[Hashable, List[Hashable]]:
+    """Subsumers to check for each subsumee, in the order they come"""
+    groups: Dict[Hashable, List[Hashable]] = {}
+    for subsumee, subsumer in pairs:
+        groups.setdefault(subsumee, []).append(subsumer)
+    return groups
+
+
+def read_classes(lines: Iterable[str]) -> Iterator[str]:
+    """Class names, one per line (e.g. of an open file or stdin), read
+    lazily. Blank lines and lines starting with `#` are skipped.
+    """
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def write_subsumers(
+    out: TextIO,
+    output_format: str,
+    class_name: str,
+    subsumers: Optional[Iterable[str]] = None,
+    error: Optional[str] = None,
+) -> None:
+    """Write the `subsumers` of `class_name`, or the `error` it got, in
+    `output_format` (see above), and flush right away
+    """
+    assert output_format in FORMATS, f"Unknown output format {output_format}"
+
+    if output_format == "jsonl":
+        record = {"class": class_name}
+        if error is not None:
+            record["error"] = error
+        else:
+            record["subsumers"] = list(subsumers)
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    elif error is not None:
+        print(f"{class_name}: {error}", file=sys.stderr)
+    else:
+        out.writelines(f"{class_name}\t{subsumer}\n" for subsumer in subsumers)
+
+    out.flush()
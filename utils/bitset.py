@@ -0,0 +1,93 @@
+"""
+Sets of dense IDs (such as `TermId`) stored as the bits of a
+Python int, so union, subset and membership are word-level
+operations and a label only costs one bit per input concept.
+"""
+
+from typing import Iterable, Iterator
+
+
+class Bitset:
+    """
+    Mutable set of non-negative ints, element `i` is bit `i` of `bits`.
+
+    Iterating goes over a snapshot of the bits, so the set can be
+    added to while it is being iterated.
+    """
+
+    __slots__ = ("bits",)
+
+    bits: int
+
+    def __init__(self, items: Iterable[int] = ()) -> None:
+        bits = 0
+        for item in items:
+            bits |= 1 << item
+        self.bits = bits
+
+    @classmethod
+    def from_bits(cls, bits: int) -> "Bitset":
+        bitset = cls()
+        bitset.bits = bits
+        return bitset
+
+    @staticmethod
+    def to_bits(items: "Bitset | Iterable[int]") -> int:
+        return items.bits if isinstance(items, Bitset) else Bitset(items).bits
+
+    def add(self, item: int) -> bool:
+        """Add `item`, returns whether it was not there yet"""
+        mask = 1 << item
+        if self.bits & mask:
+            return False
+        self.bits |= mask
+        return True
+
+    def discard(self, item: int) -> None:
+        self.bits &= ~(1 << item)
+
+    def copy(self) -> "Bitset":
+        return Bitset.from_bits(self.bits)
+
+    def __contains__(self, item: int) -> bool:
+        return (self.bits >> item) & 1 == 1
+
+    def __iter__(self) -> Iterator[int]:
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            yield lowest.bit_length() - 1
+            bits ^= lowest
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __ior__(self, other: "Bitset | Iterable[int]") -> "Bitset":
+        self.bits |= Bitset.to_bits(other)
+        return self
+
+    def __or__(self, other: "Bitset | Iterable[int]") -> "Bitset":
+        return Bitset.from_bits(self.bits | Bitset.to_bits(other))
+
+    def __and__(self, other: "Bitset | Iterable[int]") -> "Bitset":
+        return Bitset.from_bits(self.bits & Bitset.to_bits(other))
+
+    def __sub__(self, other: "Bitset | Iterable[int]") -> "Bitset":
+        return Bitset.from_bits(self.bits & ~Bitset.to_bits(other))
+
+    def __le__(self, other: "Bitset | Iterable[int]") -> bool:
+        return self.bits & ~Bitset.to_bits(other) == 0
+
+    def __ge__(self, other: "Bitset | Iterable[int]") -> bool:
+        return Bitset.to_bits(other) & ~self.bits == 0
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Bitset) and self.bits == other.bits
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Bitset({list(self)})"
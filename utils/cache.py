@@ -0,0 +1,78 @@
+"""
+Cache of saturated individuals shared across the queries of a reasoner.
+
+In EL the label of the individual with initial concept C does not
+depend on the query it was derived in, so once saturated it can be
+reused as is by any later model.
+"""
+
+import sys
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from utils.terms import TermId
+
+
+class SaturationCache:
+    """
+    Saturated labels (bits of the individual's `Bitset`) keyed by
+    initial concept, evicting the least recently used entry once
+    there are more than `maxsize`. With `maxsize=None` it is unbounded.
+    """
+
+    maxsize: Optional[int]
+    hits: int
+    misses: int
+    evictions: int
+
+    _labels: "OrderedDict[TermId, int]"
+
+    def __init__(self, maxsize: Optional[int] = 4096) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._labels = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def __contains__(self, concept: TermId) -> bool:
+        return concept in self._labels
+
+    def get(self, concept: TermId) -> Optional[int]:
+        label = self._labels.get(concept)
+        if label is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._labels.move_to_end(concept)
+        return label
+
+    def put(self, concept: TermId, label: int) -> None:
+        self._labels[concept] = label
+        self._labels.move_to_end(concept)
+
+        if self.maxsize is not None:
+            while len(self._labels) > self.maxsize:
+                self._labels.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        self._labels.clear()
+
+    def nbytes(self) -> int:
+        """Bytes taken by the stored labels and the mapping itself"""
+        return sys.getsizeof(self._labels) + sum(
+            sys.getsizeof(label) for label in self._labels.values()
+        )
+
+    def info(self) -> Dict[str, Optional[int]]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+            "maxsize": self.maxsize,
+        }
@@ -0,0 +1,159 @@
+"""
+Compact storage of the role edges between the individuals of a model.
+
+Individuals are referred to by their integer ID. For each role, the
+neighbours of an individual are an array of machine integers (4 bytes
+per edge) instead of a set of objects. Arrays are kept sorted, so
+membership and removal are binary searches, and iteration runs in C.
+"""
+
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, Sequence, Tuple
+
+from utils.terms import RoleId
+
+
+class Adjacency:
+    """
+    Edges of one role: `rows[n]` is the sorted array of the neighbours
+    of individual `n`, only there once it has one. Rows grow amortized
+    (over-allocated by `array` itself).
+    """
+
+    __slots__ = ("rows", "edges")
+
+    rows: Dict[int, array]
+    edges: int
+
+    def __init__(self) -> None:
+        self.rows = {}
+        self.edges = 0
+
+    def __iter__(self) -> Iterator[int]:
+        """Individuals with at least one edge"""
+        return (node for node, row in self.rows.items() if row)
+
+    def neighbours(self, node: int) -> Sequence[int]:
+        """Not to be changed while iterated"""
+        return self.rows.get(node, ())
+
+    def has(self, source: int, target: int) -> bool:
+        row = self.rows.get(source)
+        if row is None:
+            return False
+        i = bisect_left(row, target)
+        return i < len(row) and row[i] == target
+
+    def add(self, source: int, target: int) -> bool:
+        """Returns whether the edge is new"""
+        row = self.rows.get(source)
+        if row is None:
+            self.rows[source] = array("i", (target,))
+            self.edges += 1
+            return True
+
+        i = bisect_left(row, target)
+        if i < len(row) and row[i] == target:
+            return False
+
+        row.insert(i, target)
+        self.edges += 1
+        return True
+
+    def remove(self, source: int, target: int) -> bool:
+        """Returns whether the edge was there"""
+        row = self.rows.get(source)
+        if row is None:
+            return False
+        i = bisect_left(row, target)
+        if i == len(row) or row[i] != target:
+            return False
+
+        row.pop(i)
+        self.edges -= 1
+        return True
+
+    def clear(self, source: int) -> Sequence[int]:
+        """Remove all the edges out of `source`, returns their targets"""
+        row = self.rows.pop(source, None)
+        if row is None:
+            return ()
+
+        self.edges -= len(row)
+        return row
+
+    def nbytes(self) -> int:
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self.rows)
+            + sum(sys.getsizeof(row) for row in self.rows.values())
+        )
+
+
+class RoleGraph:
+    """
+    `Adjacency` of the successors for each role, and of the predecessors
+    the other way around, kept in sync
+    """
+
+    successors: Dict[RoleId, Adjacency]
+    predecessors: Dict[RoleId, Adjacency]
+
+    def __init__(self) -> None:
+        self.successors = {}
+        self.predecessors = {}
+
+    def add(self, source: int, role: RoleId, target: int) -> bool:
+        """Returns whether the edge is new"""
+        successors = self.successors.get(role)
+        if successors is None:
+            successors = self.successors[role] = Adjacency()
+            self.predecessors[role] = Adjacency()
+
+        if not successors.add(source, target):
+            return False
+        # new as a successor, so new as a predecessor as well
+        self.predecessors[role].add(target, source)
+        return True
+
+    def has(self, source: int, role: RoleId, target: int) -> bool:
+        successors = self.successors.get(role)
+        return successors is not None and successors.has(source, target)
+
+    def successors_of(self, source: int, role: RoleId) -> Sequence[int]:
+        successors = self.successors.get(role)
+        return successors.neighbours(source) if successors is not None else ()
+
+    def predecessors_of(self, target: int, role: RoleId) -> Sequence[int]:
+        predecessors = self.predecessors.get(role)
+        return predecessors.neighbours(target) if predecessors is not None else ()
+
+    def edges_of(self, source: int) -> Iterator[Tuple[RoleId, int]]:
+        """`(role, successor)` for all the edges out of `source`"""
+        for role, successors in self.successors.items():
+            for target in successors.neighbours(source):
+                yield role, target
+
+    def in_edges_of(self, target: int) -> Iterator[Tuple[RoleId, int]]:
+        """`(role, predecessor)` for all the edges into `target`"""
+        for role, predecessors in self.predecessors.items():
+            for source in predecessors.neighbours(target):
+                yield role, source
+
+    def clear(self, source: int) -> None:
+        """Remove all the edges out of `source`"""
+        for role, successors in self.successors.items():
+            for target in successors.clear(source):
+                self.predecessors[role].remove(target, source)
+
+    def __len__(self) -> int:
+        return sum(successors.edges for successors in self.successors.values())
+
+    def nbytes(self) -> int:
+        return sum(
+            adjacency.nbytes()
+            for edges in (self.successors, self.predecessors)
+            for adjacency in edges.values()
+        )
@@ -0,0 +1,64 @@
+"""
+Graph algorithms over the hierarchy, written without recursion
+so deep hierarchies can't hit the recursion limit.
+"""
+
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Tuple, TypeVar
+
+Node = TypeVar("Node", bound=Hashable)
+
+
+def strongly_connected_components(
+    nodes: Iterable[Node],
+    successors: Callable[[Node], Iterable[Node]],
+) -> List[List[Node]]:
+    """Tarjan's algorithm.
+
+    Components come out in reverse topological order: every component
+    only reaches itself and components listed before it.
+    """
+    index: Dict[Node, int] = {}
+    lowlink: Dict[Node, int] = {}
+    on_stack = set()
+    stack: List[Node] = []
+    components: List[List[Node]] = []
+
+    for root in nodes:
+        if root in index:
+            continue
+
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work: List[Tuple[Node, Iterator[Node]]] = [(root, iter(successors(root)))]
+
+        while work:
+            node, children = work[-1]
+
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(child))))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            else:
+                # all the children of `node` are done
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+    return components
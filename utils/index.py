@@ -0,0 +1,65 @@
+"""
+Indexes over the input concepts of a model, built once so the
+completion rules only look at the input concepts that can fire.
+"""
+
+from collections import defaultdict
+from typing import DefaultDict, Dict, Iterable, List, Tuple
+
+from utils.models import ConceptType
+from utils.terms import RoleId, TermId, TermTable
+
+
+class ConceptIndex:
+    """
+    - `conjunctions`: concept C -> [(D, C ⊓ D)] for every input
+    conjunction C ⊓ D, so ⊓-rule 2 only checks the partner D
+
+    - `existentials`: (r, C) -> ∃r.C for every input existential
+
+    - `by_filler`: C -> [(r, ∃r.C)], the same the other way around, so
+    ∃-rule 2 knows which existentials a concept of a successor can give
+    """
+
+    conjunctions: DefaultDict[TermId, List[Tuple[TermId, TermId]]]
+    existentials: Dict[Tuple[RoleId, TermId], TermId]
+    by_filler: DefaultDict[TermId, List[Tuple[RoleId, TermId]]]
+
+    def __init__(self, terms: TermTable, input_concepts: Iterable[TermId]) -> None:
+        self.conjunctions = defaultdict(list)
+        self.existentials = {}
+        self.by_filler = defaultdict(list)
+
+        for concept in input_concepts:
+            self.add_concept(terms, concept)
+
+    def add_concept(self, terms: TermTable, concept: TermId) -> None:
+        kind = terms.kinds[concept]
+        if kind is ConceptType.CONJUNCTION:
+            self.add_conjunction(concept, terms.conjuncts[concept])
+        elif kind is ConceptType.EXISTENTIAL:
+            self.add_existential(concept, terms.roles[concept], terms.fillers[concept])
+
+    def add_conjunction(
+        self,
+        conjunction: TermId,
+        conjuncts: Tuple[TermId, ...],
+    ) -> None:
+        # ⊓-rule 2 only builds binary conjunctions
+        assert (
+            len(set(conjuncts)) <= 2
+        ), "Wider conjunctions must be binarized first, see `TermTable.binarize`"
+
+        first, second = conjuncts[0], conjuncts[-1]
+        self.conjunctions[first].append((second, conjunction))
+        if first != second:
+            self.conjunctions[second].append((first, conjunction))
+
+    def add_existential(
+        self,
+        existential: TermId,
+        role: RoleId,
+        filler: TermId,
+    ) -> None:
+        self.existentials[(role, filler)] = existential
+        self.by_filler[filler].append((role, existential))
@@ -1,41 +1,43 @@
-from collections import defaultdict
-from typing import DefaultDict, Optional, Set
+from typing import Dict, Set
 
-from utils.models import Concept, ELFactory
-
-el_factory = ELFactory()
-top = el_factory.get_top()
+from utils.bitset import Bitset
+from utils.terms import TOP, RoleId, TermId
 
 
 class Individual:
     """
-    Individual must be initialized with initial concept
+    Individual must be initialized with its ID in the model
+    and its initial concept
 
     The initial concept and further added concepts are
-    stored in the `concepts` set
+    stored in the `concepts` set, a bitset over concept IDs
 
-    Successors relations are stored in `successors` in the form:
+    Successor relations are not stored here, but in the `RoleGraph`
+    of the model (see `utils.edges`), between individual IDs
 
-    `{role: set(role-successors)}`
+    A `saturated` individual has been taken from the saturation cache:
+    its label is already complete and no rule has to fire on it
 
-    where the `role` is the key and the value is a set containing
-    all the individuals connected by `role` found
+    Concepts and roles are IDs from the `TermTable`
     """
 
-    initial_concept: Concept
-    concepts: Set[Concept]
-    successors: DefaultDict[Concept, Set[Optional["Individual"]]]
+    # no `__dict__`, models can have a lot of individuals
+    __slots__ = ("id", "initial_concept", "concepts", "saturated")
 
-    def __init__(self, initial_concept: Concept) -> None:
-        self.initial_concept = initial_concept
-        self.concepts = {top, self.initial_concept}
-        self.successors = defaultdict(set)
+    id: int
+    initial_concept: TermId
+    concepts: Bitset
+    saturated: bool
 
-    def add_concept(self, concept: Concept) -> None:
-        self.concepts.add(concept)
+    def __init__(self, id: int, initial_concept: TermId) -> None:
+        self.id = id
+        self.initial_concept = initial_concept
+        self.concepts = Bitset((TOP, self.initial_concept))
+        self.saturated = False
 
-    def add_successor(self, role: Concept, successor: "Individual") -> None:
-        self.successors[role].add(successor)
+    def add_concept(self, concept: TermId) -> bool:
+        """Returns whether `concept` is new to the individual"""
+        return self.concepts.add(concept)
 
     def __eq__(self, __value: object) -> bool:
         return self.initial_concept == __value.initial_concept
@@ -47,4 +49,4 @@ class Individual:
         return str(self.initial_concept)
 
 
-RelationsDict = DefaultDict[Concept, Set[Individual]]
+RelationsDict = Dict[RoleId, Set[Individual]]
@@ -0,0 +1,132 @@
+"""
+Opt-in profiling of the completion rules.
+
+Only with a `Metrics` are models built as `MeteredModel`, whose rule
+methods are timed and counted versions of the ones of `Model`. Without
+it the rules run exactly as they are written.
+"""
+
+import json
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable
+
+# as named in the docstring of `Model`
+RULES = ("⊑-rule", "⊓-rule 1", "⊓-rule 2", "∃-rule 1", "∃-rule 2")
+
+
+class RuleStats:
+    """
+    For one rule:
+        - `invocations` is the number of times it was fired
+        - `produced` is the number of concepts (or successors) it
+        assigned that were new
+        - `discarded` is the number of the ones it derived that were
+        already there, or were not input concepts
+        - `seconds` is the time spent in it
+    """
+
+    __slots__ = ("invocations", "produced", "discarded", "seconds")
+
+    invocations: int
+    produced: int
+    discarded: int
+    seconds: float
+
+    def __init__(self) -> None:
+        self.invocations = 0
+        self.produced = 0
+        self.discarded = 0
+        self.seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+
+class Metrics:
+    """
+    Counters shared by all the models of a reasoner:
+        - `rules` has the `RuleStats` of each rule
+        - `models` is the number of models built
+        - `firings` is the number of times the rules were fired (see
+        `Model.firings`) and `passes` the number of passes of the naive loop
+        - `individuals` is the number of individuals created, `cache_hits`
+        how many of them were taken saturated from the cache
+        - `produced` and `discarded` are totals over all the rules
+        - `seconds` is the time spent applying the rules
+        - `gateway_calls` is the number of calls over the gateway
+    """
+
+    rules: Dict[str, RuleStats]
+    models: int
+    firings: int
+    passes: int
+    individuals: int
+    cache_hits: int
+    produced: int
+    discarded: int
+    seconds: float
+    gateway_calls: int
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.rules = {rule: RuleStats() for rule in RULES}
+        self.models = 0
+        self.firings = 0
+        self.passes = 0
+        self.individuals = 0
+        self.cache_hits = 0
+        self.produced = 0
+        self.discarded = 0
+        self.seconds = 0.0
+        self.gateway_calls = 0
+
+    def timed(self, rule: str, fire: Callable[..., Any], *args: Any) -> Any:
+        """`fire(*args)` timed and counted as an invocation of `rule`, with
+        what it produced and discarded through the counted methods
+        of the model
+        """
+        stats = self.rules[rule]
+        produced, discarded = self.produced, self.discarded
+        start = perf_counter()
+        result = fire(*args)
+        stats.seconds += perf_counter() - start
+        stats.invocations += 1
+        stats.produced += self.produced - produced
+        stats.discarded += self.discarded - discarded
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rules": {rule: stats.to_dict() for rule, stats in self.rules.items()},
+            "models": self.models,
+            "firings": self.firings,
+            "passes": self.passes,
+            "individuals": self.individuals,
+            "cache_hits": self.cache_hits,
+            "produced": self.produced,
+            "discarded": self.discarded,
+            "seconds": self.seconds,
+            "gateway_calls": self.gateway_calls,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def summary(self) -> Iterable[str]:
+        """Lines of a human readable table"""
+        yield (
+            f"{'rule':<10}{'fired':>10}{'produced':>10}"
+            f"{'discarded':>11}{'seconds':>10}"
+        )
+        for rule, stats in self.rules.items():
+            yield (
+                f"{rule:<10}{stats.invocations:>10}{stats.produced:>10}"
+                f"{stats.discarded:>11}{stats.seconds:>10.4f}"
+            )
+        yield ""
+        yield f"models: {self.models}, firings: {self.firings}, passes: {self.passes}"
+        yield f"individuals: {self.individuals}, cache hits: {self.cache_hits}"
+        yield f"time applying rules: {self.seconds:.4f}s"
+        yield f"gateway calls: {self.gateway_calls}"
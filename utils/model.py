@@ -1,14 +1,33 @@
 import logging
-from collections import defaultdict
-from typing import Optional, Set
-
+import sys
+from collections import defaultdict, deque
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from utils.bitset import Bitset
+from utils.cache import SaturationCache
+from utils.edges import RoleGraph
+from utils.index import ConceptIndex
 from utils.individual import Individual, RelationsDict
-from utils.models import Axiom, AxiomType, Concept, ConceptType, ELFactory
+from utils.metrics import Metrics
+from utils.models import ConceptType
+from utils.tbox import TBox
+from utils.terms import TOP, RoleId, TermId, TermTable
+from utils.trace import NONE, Category, EventKind, Tracer
 
 logger = logging.getLogger(__name__)
 
-el_factory = ELFactory()
-
 
 class NotInitializedModel(Exception):
     pass
@@ -50,134 +69,279 @@ class Model:
 
         2. Apply the EL-completion rules exhaustively, with the restriction that only
         concepts from the input are assigned.
+
+    Concepts, roles and axioms are IDs from the `TermTable` `terms`, so
+    applying the rules never goes over the gateway.
+
+    The ⊑-rule is answered by the indexes of `tbox` instead of scanning
+    all the GCIs. Through `index`, ⊓-rule 2 only checks the input
+    conjunctions a concept takes part in, and ∃-rule 2 is a lookup of
+    the input existentials with a given role and filler.
+
+    By default the rules are applied semi-naively: every newly derived fact
+    (an individual gets a concept, or an individual gets an r-successor) is
+    queued, and only the rules that fact can trigger are fired. With `naive`
+    all the rules are rerun over every individual until a full pass makes no
+    change, which reaches the same fixpoint.
+
+    With a `cache`, individuals already saturated by earlier models are
+    reused instead of re-derived, and the ones saturated here are stored.
+
+    `firings` counts how many times the rules were fired: once per queued
+    fact, or once per individual in every pass of the naive loop.
+
+    `metrics` gets the passes of the naive loop, the rules are only
+    profiled into it by a `MeteredModel` (see `model_class`).
+
+    What gets traced, the state of the model to the log and the derivations
+    of the worklist, is up to `tracer` (see `utils.trace`), derivations are
+    only emitted by a `TracedModel`. By default the state is logged at
+    DEBUG level.
+
+    Individuals are kept in `individuals`, indexed by their ID, and the
+    role edges between them in `edges` (see `utils.edges`).
+
+    With `goal_directed`, a model for `subsumee` ⊑ `subsumer` stops as soon
+    as the subsumer is derived for the initial individual, and the facts
+    that can lead to it (`TBox.antecedents`) are fired first. The labels
+    are then left incomplete (`complete` is false), and only the individuals
+    that can't get anything from the facts left in the queue are cached.
     """
 
-    input_concepts: Set[Concept]
-    gci_axioms: Set[Axiom]
-    individuals: Set[Optional[Individual]]
-    _tmp_individuals: Set[Optional[Individual]]
+    terms: TermTable
+    input_concepts: Set[TermId]
+    tbox: TBox
+    index: ConceptIndex
+    cache: Optional[SaturationCache]
+    individuals: List[Individual]
+    edges: RoleGraph
     initial_individual: Optional[Individual]
-    subsumer: Optional[Individual]
+    subsumer: Optional[TermId]
     is_initialized: bool
+    naive: bool
+    goal_directed: bool
+    complete: bool
+    firings: int
+    metrics: Optional[Metrics]
+    tracer: Tracer
+
+    _by_concept: Dict[TermId, Individual]
+    _relevant: FrozenSet[TermId]
+    _queue: Deque[Tuple[Individual, TermId, bool]]
 
     log: logging.Logger
 
     def __init__(
         self,
-        input_concepts: Set[Concept],
-        axioms: Set[Axiom],
+        terms: TermTable,
+        input_concepts: Set[TermId],
+        tbox: TBox,
+        naive: bool = False,
+        index: Optional[ConceptIndex] = None,
+        cache: Optional[SaturationCache] = None,
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[Tracer] = None,
+        goal_directed: bool = False,
     ) -> None:
+        self.terms = terms
         self.input_concepts = input_concepts
-        self.gci_axioms = set(
-            axiom for axiom in axioms if axiom.type == AxiomType.GCI.value
-        )
-        self.individuals = set()
-        self._tmp_individuals = set()
+        self.tbox = tbox
+        self.index = index if index is not None else ConceptIndex(terms, input_concepts)
+        self.cache = cache
+        self.naive = naive
+        self.goal_directed = goal_directed
+        self.complete = False
+        self._by_concept = {}
+        self._relevant = frozenset()
+        self._queue = deque()
+        self.individuals = []
+        self.edges = RoleGraph()
         self.initial_individual = None
         self.subsumer = None
         self.is_initialized = False
+        self.firings = 0
+        self.metrics = metrics
+        self.tracer = tracer if tracer is not None else Tracer()
 
         self.log = logger.getChild("Model")
 
     def initialize_model(
         self,
-        subsumee: Concept,
-        subsumer: Concept,
+        subsumee: TermId,
+        subsumer: TermId,
     ) -> None:
-        self.initial_individual = Individual(subsumee)
+        self.clear()
+        if self.goal_directed:
+            self._relevant = self.tbox.antecedents(subsumer)
+        self.initial_individual = self.get_individual(subsumee)
         self.subsumer = subsumer
-        self.individuals.clear()
-        self._tmp_individuals.clear()
-        self.individuals.add(self.initial_individual)
         self.is_initialized = True
 
+    def initialize_classification(
+        self,
+        concepts: Iterable[TermId],
+    ) -> None:
+        """One individual per concept in `concepts`, all in the same graph.
+
+        Individuals for existential fillers are shared as well, as
+        ∃-rule 1 reuses any individual with the filler as initial concept.
+        """
+        self.clear()
+        for concept in concepts:
+            self.get_individual(concept)
+        self.is_initialized = True
+
+    def clear(self) -> None:
+        self.individuals = []
+        self.edges = RoleGraph()
+        self._by_concept = {}
+        self._queue.clear()
+        self._relevant = frozenset()
+        self.complete = False
+        self.initial_individual = None
+        self.subsumer = None
+
+    def find_individual(self, concept: TermId) -> Optional[Individual]:
+        """The individual with initial concept `concept`, if there is one"""
+        return self._by_concept.get(concept)
+
+    def _add_individual(self, concept: TermId) -> Individual:
+        individual = Individual(len(self.individuals), concept)
+        self.individuals.append(individual)
+        self._by_concept[concept] = individual
+        return individual
+
+    def successors(self, individual: Individual, role: RoleId) -> List[Individual]:
+        individuals = self.individuals
+        return [individuals[s] for s in self.edges.successors_of(individual.id, role)]
+
+    def predecessors(self, individual: Individual, role: RoleId) -> List[Individual]:
+        individuals = self.individuals
+        return [individuals[p] for p in self.edges.predecessors_of(individual.id, role)]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes taken by the individuals, their labels and the edges
+        between them (the arrays and objects themselves, not the shared
+        small ints)
+        """
+        individuals = sys.getsizeof(self.individuals) + sum(
+            sys.getsizeof(i) for i in self.individuals
+        )
+        labels = sum(
+            sys.getsizeof(i.concepts) + sys.getsizeof(i.concepts.bits)
+            for i in self.individuals
+        )
+        edges = self.edges.nbytes()
+        index = sys.getsizeof(self._by_concept)
+
+        return {
+            "individuals": len(self.individuals),
+            "edges": len(self.edges),
+            "individual_bytes": individuals + index,
+            "label_bytes": labels,
+            "edge_bytes": edges,
+            "total_bytes": individuals + index + labels + edges,
+        }
+
     @property
-    def subsumee(self) -> Concept:
+    def subsumee(self) -> TermId:
         return self.initial_individual.initial_concept
 
+    def goal_reached(self) -> bool:
+        """With `goal_directed`, whether the initial individual has the subsumer"""
+        return (
+            self.goal_directed
+            and self.subsumer is not None
+            and self.subsumer in self.initial_individual.concepts
+        )
+
+    def _push(self, individual: Individual, concept: TermId, told: bool) -> None:
+        """Queue a fact, first in line if it can lead to the goal"""
+        if concept in self._relevant:
+            self._queue.appendleft((individual, concept, told))
+        else:
+            self._queue.append((individual, concept, told))
+
     def get_new_concepts(
         self,
-        *concepts: Concept | Set[Concept],
-    ) -> Set[Concept]:
+        *concepts: Optional[TermId] | Iterable[TermId],
+    ) -> Set[TermId]:
         """We have found some potentially new concepts to add to the individual,
         but first one have to check whether the concepts are present in the
         input concepts
+
+        `None` stands for a concept that is not even in the term table
         """
         new_concepts = set()
 
         for concept in concepts:
-            if isinstance(concept, Concept) and concept in self.input_concepts:
-                new_concepts.add(concept)
-            elif isinstance(concept, set):
+            if concept is None:
+                continue
+            if isinstance(concept, int):
+                if concept in self.input_concepts:
+                    new_concepts.add(concept)
+            else:
                 new_concepts |= set(c for c in concept if c in self.input_concepts)
 
         return new_concepts
 
     def get_new_concepts_from_successor(
         self,
-        role: Concept,
+        role: RoleId,
         successor: Individual,
-    ) -> Set[Concept]:
+    ) -> Set[TermId]:
         new_concepts = set()
 
         for concept in successor.concepts:
             new_concepts |= self.get_new_concepts(
-                el_factory.get_existential_role_restriction(role, concept)
+                self.index.existentials.get((role, concept))
             )
         return new_concepts
 
     def get_new_concepts_from_tbox(
         self,
-        concept: Concept,
-    ) -> Set[Concept]:
-        new_concepts = set()
-
-        for axiom in self.gci_axioms:
-            if concept == axiom.lhs:
-                new_concepts |= self.get_new_concepts(axiom.rhs)
-
-        return new_concepts
+        concept: TermId,
+    ) -> Set[TermId]:
+        return self.get_new_concepts(self.tbox.superclasses(concept))
 
     def get_new_individual(
         self,
-        concept: Concept,
+        concept: TermId,
     ) -> Individual:
         # If there is an element `individual` with initial concept `concept` assigned,
         # return that element
-        for inidividual in self.individuals:
-            if inidividual.initial_concept == concept:
-                return inidividual
+        individual = self._by_concept.get(concept)
+        if individual is not None:
+            return individual
 
-        # Otherwise, create a new individual with initial concept `concept`
-        new_individual = Individual(concept)
-        self._tmp_individuals.add(new_individual)
-
-        return new_individual
+        # Otherwise, create a new individual with initial concept `concept`,
+        # the naive loop only gets to it in its next pass
+        return self._add_individual(concept)
 
     def first_conj_rule(
         self,
         individual: Individual,
-    ) -> Set[Concept]:
+    ) -> Set[TermId]:
         """⊓-rule 1: If d has C ⊓ D assigned, assign also C and D to d."""
         new_concepts = set()
 
         for concept in individual.concepts:
-            if concept.type == ConceptType.CONJUNCTION.value:
-                new_concepts |= self.get_new_concepts(concept.conjuncts)
+            if self.terms.kinds[concept] is ConceptType.CONJUNCTION:
+                new_concepts |= self.get_new_concepts(self.terms.conjuncts[concept])
 
         return new_concepts
 
     def second_conj_rule(
         self,
         individual: Individual,
-    ) -> Set[Concept]:
+    ) -> Set[TermId]:
         """⊓-rule 2: If d has C and D assigned, assign also C ⊓ D to d."""
         new_concepts = set()
 
-        for first_concept in individual.concepts:
-            for second_concept in individual.concepts:
-                conjunction = el_factory.get_conjunction(first_concept, second_concept)
-                new_concepts |= self.get_new_concepts(conjunction)
+        for concept in individual.concepts:
+            for partner, conjunction in self.index.conjunctions.get(concept, ()):
+                if partner in individual.concepts:
+                    new_concepts |= self.get_new_concepts(conjunction)
 
         return new_concepts
 
@@ -196,9 +360,9 @@ class Model:
         new_successors = defaultdict(set)
 
         for concept in individual.concepts:
-            if concept.type == ConceptType.EXISTENTIAL.value:
-                new_successors[concept.role].add(
-                    self.get_new_individual(concept.filler)
+            if self.terms.kinds[concept] is ConceptType.EXISTENTIAL:
+                new_successors[self.terms.roles[concept]].add(
+                    self.get_new_individual(self.terms.fillers[concept])
                 )
 
         return new_successors
@@ -206,20 +370,21 @@ class Model:
     def second_exist_rule(
         self,
         individual: Individual,
-    ) -> Set[Concept]:
+    ) -> Set[TermId]:
         """∃-rule 2: If d has an r -successor with C assigned, add ∃r .C to d."""
         new_concepts = set()
 
-        for role, successors in individual.successors.items():
-            for successor in successors:
-                new_concepts |= self.get_new_concepts_from_successor(role, successor)
+        for role, successor in self.edges.edges_of(individual.id):
+            new_concepts |= self.get_new_concepts_from_successor(
+                role, self.individuals[successor]
+            )
 
         return new_concepts
 
     def contained_rule(
         self,
         individual: Individual,
-    ) -> Set[Concept]:
+    ) -> Set[TermId]:
         """⊑-rule: If d has C assigned and C ⊑ D ∈ T , then also assign D to d"""
         new_concepts = set()
 
@@ -228,46 +393,301 @@ class Model:
 
         return new_concepts
 
+    def logs_state(self) -> bool:
+        """Whether the state of the model would be logged at all, checked
+        before building any of it
+        """
+        return self.tracer.logs(Category.STATE, self.log)
+
     def log_individual_state(
         self,
         individual: Individual,
     ) -> None:
-        self.log.info(
-            f"{'':<4}Concepts of inidividual with main concept {individual.initial_concept} ({len(individual.concepts)}):"
+        fmt = self.terms.format
+        level = self.tracer.level
+
+        concept, size = fmt(individual.initial_concept), len(individual.concepts)
+        self.log.log(
+            level,
+            f"{'':<4}Concepts of inidividual with main concept {concept} ({size}):",
         )
 
         for c in individual.concepts:
-            self.log.info(f"{'':<8}- {c}")
-
-        self.log.info(f"{'':<4}Its relations are:")
-        for r in individual.successors.keys():
-            self.log.info(f"{'':<4}{r} - successors:")
-            for s in individual.successors[r]:
-                self.log.info(
-                    f"{'':<8}- {s.initial_concept}: {[str(c) for c in s.concepts]}"
-                )
+            self.log.log(level, f"{'':<8}- {fmt(c)}")
+
+        self.log.log(level, f"{'':<4}Its relations are:")
+        for r in self.edges.successors:
+            successors = self.successors(individual, r)
+            if not successors:
+                continue
+            self.log.log(level, f"{'':<4}{self.terms.role_names[r]} - successors:")
+            for s in successors:
+                concepts = self.terms.format_all(s.concepts)
+                self.log.log(level, f"{'':<8}- {fmt(s.initial_concept)}: {concepts}")
 
     def log_state(self) -> None:
-        self.log.info(f"{'-' * 80}")
-        self.log.info(
-            f"There are currently {len(self.individuals)} individuals in the model"
+        level = self.tracer.level
+
+        self.log.log(level, f"{'-' * 80}")
+        self.log.log(
+            level,
+            f"There are currently {len(self.individuals)} individuals in the model",
         )
-        self.log.info(
-            f"The initial concepts happening are: {[str(i.initial_concept) for i in self.individuals]}"
+        initial_concepts = self.terms.format_all(
+            i.initial_concept for i in self.individuals
         )
-        self.log.info(f"{'-' * 80}")
+        self.log.log(level, f"The initial concepts happening are: {initial_concepts}")
+        self.log.log(level, f"{'-' * 80}")
 
-    def apply_rules(self) -> bool:
-        """Decide whether O |= `subsumee` ⊑ `subsumer`
+    def add_concept(
+        self,
+        individual: Individual,
+        concept: Optional[TermId],
+        told: bool = False,
+    ) -> bool:
+        """Assign `concept` to `individual` if it is a new input concept,
+        and queue the fact so the rules it can trigger get fired.
+        Returns whether it was assigned.
+
+        `told` is for concepts coming from the told closure of another one:
+        their own told superclasses are already in that closure.
+        """
+        if concept is None or concept not in self.input_concepts:
+            return False
 
-        1. Start with initial element `initial_individual`, assigned as initial concept `subsumee`.
+        if individual.add_concept(concept):
+            self._push(individual, concept, told)
+            return True
+        return False
 
-        2. Apply the EL-completion rules exhaustively, with the restriction that only
-        concepts from the input are assigned.
+    def add_successor(
+        self,
+        individual: Individual,
+        role: RoleId,
+        successor: Individual,
+    ) -> bool:
+        if not self.edges.add(individual.id, role, successor.id):
+            return False
+
+        # ∃-rule 2 for the concepts the successor already has
+        existentials = self.index.existentials
+        for concept in successor.concepts:
+            self.add_concept(individual, existentials.get((role, concept)))
+
+        return True
+
+    def get_individual(
+        self,
+        concept: TermId,
+    ) -> Individual:
+        """Same as `get_new_individual`, but the new individual is added
+        to the model right away and its concepts are queued, unless it
+        can be taken already saturated from the cache
         """
+        individual = self._by_concept.get(concept)
+        if individual is not None:
+            return individual
 
-        if not self.is_initialized:
-            raise NotInitializedModel("Model not initialized")
+        individual = self._add_individual(concept)
+
+        label = self.cache.get(concept) if self.cache is not None else None
+        if label is not None:
+            individual.concepts = Bitset.from_bits(label)
+            individual.saturated = True
+            return individual
+
+        for c in individual.concepts:
+            self._push(individual, c, False)
+
+        return individual
+
+    def inherit(self, individual: Individual, label: Bitset) -> None:
+        """Give `individual` the concepts of `label` without queueing them.
+
+        `label` must be the saturated label of a subsumer of the initial
+        concept of `individual`: the rules its concepts fire on their own
+        have all been fired for it already, and the ones they fire along
+        with concepts new to `individual` are fired by the new concepts.
+        """
+        individual.concepts |= label
+
+    def fire_contained_rule(
+        self,
+        individual: Individual,
+        concept: TermId,
+    ) -> None:
+        """⊑-rule, all the told superclasses of `concept` at once"""
+        for superclass in self.tbox.superclasses(concept):
+            self.add_concept(individual, superclass, told=True)
+
+    def fire_first_conj_rule(
+        self,
+        individual: Individual,
+        concept: TermId,
+    ) -> None:
+        """⊓-rule 1 for the conjunction `concept`"""
+        for conjunct in self.terms.conjuncts[concept]:
+            self.add_concept(individual, conjunct)
+
+    def fire_first_exist_rule(
+        self,
+        individual: Individual,
+        concept: TermId,
+    ) -> None:
+        """∃-rule 1 for the existential `concept`"""
+        self.add_successor(
+            individual,
+            self.terms.roles[concept],
+            self.get_individual(self.terms.fillers[concept]),
+        )
+
+    def fire_second_conj_rule(
+        self,
+        individual: Individual,
+        concept: TermId,
+    ) -> None:
+        """⊓-rule 2 for the input conjunctions with `concept` as a conjunct"""
+        for partner, conjunction in self.index.conjunctions[concept]:
+            if partner in individual.concepts:
+                self.add_concept(individual, conjunction)
+
+    def fire_second_exist_rule(
+        self,
+        individual: Individual,
+        concept: TermId,
+    ) -> None:
+        """∃-rule 2 for the input existentials with `concept` as filler,
+        seen from the successor
+        """
+        for role, existential in self.index.by_filler[concept]:
+            for predecessor in self.predecessors(individual, role):
+                self.add_concept(predecessor, existential)
+
+    def fire_rules(
+        self,
+        individual: Individual,
+        concept: TermId,
+        told: bool = False,
+    ) -> None:
+        """Fire the rules that `concept` being newly assigned
+        to `individual` can trigger
+        """
+        if not told:
+            self.fire_contained_rule(individual, concept)
+
+        kind = self.terms.kinds[concept]
+        if kind is ConceptType.CONJUNCTION:
+            self.fire_first_conj_rule(individual, concept)
+        elif kind is ConceptType.EXISTENTIAL:
+            self.fire_first_exist_rule(individual, concept)
+
+        # most concepts are in no input conjunction or existential,
+        # don't even call the rules for them
+        if concept in self.index.conjunctions:
+            self.fire_second_conj_rule(individual, concept)
+        if concept in self.index.by_filler:
+            self.fire_second_exist_rule(individual, concept)
+
+    def saturate(self) -> None:
+        """Semi-naive application of the rules, driven by a queue
+        of newly derived facts
+        """
+        if self.goal_directed and self.subsumer is not None:
+            goal, label = self.subsumer, self.initial_individual.concepts
+            while self._queue and goal not in label:
+                self.fire_rules(*self._queue.popleft())
+                self.firings += 1
+        else:
+            while self._queue:
+                self.fire_rules(*self._queue.popleft())
+                self.firings += 1
+
+        # stopped at the goal, some labels are not saturated
+        self.complete = not self._queue
+        if self.cache is not None:
+            incomplete = self.incomplete_individuals()
+            for individual in self.individuals:
+                if not individual.saturated and individual not in incomplete:
+                    self.cache.put(individual.initial_concept, individual.concepts.bits)
+
+        if self.logs_state():
+            for individual in self.individuals:
+                self.log_individual_state(individual)
+            self.log_state()
+
+    def incomplete_individuals(self) -> Set[Individual]:
+        """Individuals whose label can still grow: the ones with facts left
+        in the queue, and their predecessors since ∃-rule 2 pulls from
+        successors. The labels of all the others are saturated.
+        """
+        incomplete = set(individual for individual, _, _ in self._queue)
+        stack = list(incomplete)
+        while stack:
+            for _, p in self.edges.in_edges_of(stack.pop().id):
+                predecessor = self.individuals[p]
+                if predecessor not in incomplete:
+                    incomplete.add(predecessor)
+                    stack.append(predecessor)
+        return incomplete
+
+    def expand(self, individual: Individual) -> None:
+        """Individuals taken from the cache have a complete label but no
+        successors, queue their concepts again so they get them back
+        """
+        if not individual.saturated:
+            return
+
+        individual.saturated = False
+        for concept in individual.concepts:
+            self._queue.append((individual, concept, False))
+
+    def refire(self, concepts: Iterable[TermId]) -> None:
+        """Queue again the facts `individual has concept` for any of `concepts`,
+        so that the rules fire again after the TBox or the input concepts grew
+        """
+        triggers = Bitset(concepts)
+
+        for individual in self.individuals:
+            self.expand(individual)
+            for concept in individual.concepts & triggers:
+                self._queue.append((individual, concept, False))
+
+    def retract(self, concepts: Iterable[TermId]) -> Set[Individual]:
+        """Over-delete after axioms with any of `concepts` as left-hand side
+        were removed: every individual that has one of them, and everything
+        that reaches those individuals as successors, is reset to its initial
+        concept. Their facts are queued to be re-derived by `saturate`.
+
+        Cached individuals have to be expanded (and saturated) beforehand,
+        otherwise their successors are unknown.
+        """
+        triggers = Bitset(concepts)
+
+        affected = set(i for i in self.individuals if i.concepts & triggers)
+        stack = list(affected)
+        while stack:
+            for _, p in self.edges.in_edges_of(stack.pop().id):
+                predecessor = self.individuals[p]
+                if predecessor not in affected:
+                    affected.add(predecessor)
+                    stack.append(predecessor)
+
+        for individual in affected:
+            self.edges.clear(individual.id)
+
+        for individual in affected:
+            individual.concepts = Bitset((TOP, individual.initial_concept))
+            for concept in individual.concepts:
+                self._queue.append((individual, concept, False))
+
+        self.log.info(f"Over-deleted {len(affected)} individuals")
+
+        return affected
+
+    def apply_rules_naive(self) -> None:
+        """Rerun all the rules over every individual until
+        a full pass makes no change
+        """
 
         # rules that can add concepts to individuals
         concept_rules = [
@@ -277,33 +697,279 @@ class Model:
             self.contained_rule,  # ⊑-rule
         ]
 
-        self.log.info("Starting to apply rules exhaustively ...")
-        self.log_state()
+        logs_state = self.logs_state()
 
         CHANGED = True
         while CHANGED:
             CHANGED = False
-            # loop over all individuals in model
-            for individual in self.individuals:
+            if self.metrics is not None:
+                self.metrics.passes += 1
+
+            # loop over all individuals in model, not the ones created in this pass
+            for individual in list(self.individuals):
+                self.firings += 1
                 # apply rules ⊓-rule 1, ⊓-rule 2, ∃-rule 2 and ⊑-rule
+                before = individual.concepts.bits
                 for rule in concept_rules:
-                    new_concepts = rule(individual)
-                    if not new_concepts <= individual.concepts:
-                        CHANGED = True
-                    individual.concepts |= new_concepts
+                    individual.concepts |= rule(individual)
+                if individual.concepts.bits != before:
+                    CHANGED = True
 
                 # ∃-rule 1
                 # this rule can't add concepts but successors
                 new_successors = self.first_exist_rule(individual)
-                if not new_successors.items() <= individual.successors.items():
-                    CHANGED = True
-                individual.successors.update(new_successors)
+                for role, successors in new_successors.items():
+                    for successor in successors:
+                        if self.edges.add(individual.id, role, successor.id):
+                            CHANGED = True
 
-                self.log_individual_state(individual)
+                if logs_state:
+                    self.log_individual_state(individual)
 
-            # add potentially newly created individuals (in ∃-rule 1) to model
-            self.individuals |= self._tmp_individuals
+            if logs_state:
+                self.log_state()
 
+            if self.goal_reached():
+                break
+
+        self.complete = not CHANGED
+
+    def run(self) -> None:
+        """Apply the EL-completion rules exhaustively to all the individuals"""
+        if not self.is_initialized:
+            raise NotInitializedModel("Model not initialized")
+
+        self.log.info("Starting to apply rules exhaustively ...")
+        if self.logs_state():
             self.log_state()
 
+        if self.naive:
+            self.apply_rules_naive()
+        else:
+            self.saturate()
+
+    def apply_rules(self) -> bool:
+        """Decide whether O |= `subsumee` ⊑ `subsumer`
+
+        1. Start with initial element `initial_individual`, assigned as initial
+        concept `subsumee`.
+
+        2. Apply the EL-completion rules exhaustively, with the restriction that only
+        concepts from the input are assigned.
+        """
+        self.run()
+
         return self.subsumer in self.initial_individual.concepts
+
+
+class TracedModel(Model):
+    """
+    `Model` emitting to `tracer` the models, the individuals and the facts
+    derived, along with the fact being fired (see `utils.trace`)
+    """
+
+    _premise: Tuple[TermId, TermId]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._premise = (NONE, NONE)
+
+    def initialize_model(self, subsumee: TermId, subsumer: TermId) -> None:
+        self.tracer.emit(EventKind.MODEL, subsumee, subsumer)
+        super().initialize_model(subsumee, subsumer)
+
+    def initialize_classification(self, concepts: Iterable[TermId]) -> None:
+        self.tracer.emit(EventKind.MODEL, NONE, NONE)
+        super().initialize_classification(concepts)
+
+    def fire_rules(
+        self,
+        individual: Individual,
+        concept: TermId,
+        told: bool = False,
+    ) -> None:
+        self._premise = (individual.initial_concept, concept)
+        super().fire_rules(individual, concept, told)
+        self._premise = (NONE, NONE)
+
+    def add_concept(
+        self,
+        individual: Individual,
+        concept: Optional[TermId],
+        told: bool = False,
+    ) -> bool:
+        if not super().add_concept(individual, concept, told):
+            return False
+        self.tracer.emit(
+            EventKind.CONCEPT, individual.initial_concept, concept, *self._premise
+        )
+        return True
+
+    def add_successor(
+        self,
+        individual: Individual,
+        role: RoleId,
+        successor: Individual,
+    ) -> bool:
+        if not super().add_successor(individual, role, successor):
+            return False
+        self.tracer.emit(
+            EventKind.SUCCESSOR,
+            individual.initial_concept,
+            role,
+            successor.initial_concept,
+            self._premise[1],
+        )
+        return True
+
+    def get_individual(self, concept: TermId) -> Individual:
+        created = concept not in self._by_concept
+        individual = super().get_individual(concept)
+        if created:
+            self.tracer.emit(EventKind.INDIVIDUAL, concept, int(individual.saturated))
+        return individual
+
+
+class MeteredModel(Model):
+    """
+    `Model` profiling the rules into `metrics` (see `utils.metrics`):
+    the rules are timed, and the facts they derive through `add_concept`
+    and `add_successor` counted as produced or discarded.
+    """
+
+    metrics: Metrics
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        assert self.metrics is not None, "A metered model needs metrics"
+        self.metrics.models += 1
+
+    def _counted(self, produced: bool) -> bool:
+        if produced:
+            self.metrics.produced += 1
+        else:
+            self.metrics.discarded += 1
+        return produced
+
+    def _timed(self, run: Callable[[], None]) -> None:
+        firings = self.firings
+        start = perf_counter()
+        run()
+        self.metrics.seconds += perf_counter() - start
+        self.metrics.firings += self.firings - firings
+
+    def add_concept(
+        self,
+        individual: Individual,
+        concept: Optional[TermId],
+        told: bool = False,
+    ) -> bool:
+        return self._counted(super().add_concept(individual, concept, told))
+
+    def add_successor(
+        self,
+        individual: Individual,
+        role: RoleId,
+        successor: Individual,
+    ) -> bool:
+        return self._counted(super().add_successor(individual, role, successor))
+
+    def get_individual(self, concept: TermId) -> Individual:
+        created = concept not in self._by_concept
+        individual = super().get_individual(concept)
+        if created:
+            self.metrics.individuals += 1
+            self.metrics.cache_hits += individual.saturated
+        return individual
+
+    def get_new_individual(self, concept: TermId) -> Individual:
+        before = len(self.individuals)
+        individual = super().get_new_individual(concept)
+        self.metrics.individuals += len(self.individuals) - before
+        return individual
+
+    # worklist, the new facts go through the counted methods above
+
+    def fire_contained_rule(self, individual: Individual, concept: TermId) -> None:
+        fire = super().fire_contained_rule
+        self.metrics.timed("⊑-rule", fire, individual, concept)
+
+    def fire_first_conj_rule(self, individual: Individual, concept: TermId) -> None:
+        fire = super().fire_first_conj_rule
+        self.metrics.timed("⊓-rule 1", fire, individual, concept)
+
+    def fire_first_exist_rule(self, individual: Individual, concept: TermId) -> None:
+        fire = super().fire_first_exist_rule
+        self.metrics.timed("∃-rule 1", fire, individual, concept)
+
+    def fire_second_conj_rule(self, individual: Individual, concept: TermId) -> None:
+        fire = super().fire_second_conj_rule
+        self.metrics.timed("⊓-rule 2", fire, individual, concept)
+
+    def fire_second_exist_rule(self, individual: Individual, concept: TermId) -> None:
+        fire = super().fire_second_exist_rule
+        self.metrics.timed("∃-rule 2", fire, individual, concept)
+
+    # naive loop, the rules return what they derive
+
+    def contained_rule(self, individual: Individual) -> Set[TermId]:
+        rule = super().contained_rule
+        return self.metrics.timed("⊑-rule", self._apply, rule, individual)
+
+    def first_conj_rule(self, individual: Individual) -> Set[TermId]:
+        rule = super().first_conj_rule
+        return self.metrics.timed("⊓-rule 1", self._apply, rule, individual)
+
+    def first_exist_rule(self, individual: Individual) -> RelationsDict:
+        rule = super().first_exist_rule
+        return self.metrics.timed("∃-rule 1", self._apply, rule, individual)
+
+    def second_conj_rule(self, individual: Individual) -> Set[TermId]:
+        rule = super().second_conj_rule
+        return self.metrics.timed("⊓-rule 2", self._apply, rule, individual)
+
+    def second_exist_rule(self, individual: Individual) -> Set[TermId]:
+        rule = super().second_exist_rule
+        return self.metrics.timed("∃-rule 2", self._apply, rule, individual)
+
+    def _apply(
+        self,
+        rule: Callable[[Individual], Any],
+        individual: Individual,
+    ) -> Any:
+        """Apply a rule of the naive loop, counting what it returns"""
+        result = rule(individual)
+        if isinstance(result, set):
+            new = sum(c not in individual.concepts for c in result)
+            total = len(result)
+        else:
+            new = sum(
+                not self.edges.has(individual.id, r, s.id)
+                for r, successors in result.items()
+                for s in successors
+            )
+            total = sum(len(successors) for successors in result.values())
+        self.metrics.produced += new
+        self.metrics.discarded += total - new
+        return result
+
+    def saturate(self) -> None:
+        self._timed(super().saturate)
+
+    def apply_rules_naive(self) -> None:
+        self._timed(super().apply_rules_naive)
+
+
+class TracedMeteredModel(TracedModel, MeteredModel):
+    """Traces what is derived, counted and timed by `MeteredModel`"""
+
+
+def model_class(metrics: Optional[Metrics], tracer: Optional[Tracer]) -> type[Model]:
+    """What models are built as, `MeteredModel` only with `metrics` and
+    `TracedModel` only if `tracer` traces derivations, so the rules pay
+    nothing for either otherwise
+    """
+    traced = tracer is not None and tracer.traces(Category.DERIVATION)
+    if metrics is None:
+        return TracedModel if traced else Model
+    return TracedMeteredModel if traced else MeteredModel
@@ -4,11 +4,10 @@ of the Java classes coming from dl4python.
 """
 
 from enum import Enum
+from functools import lru_cache
 from typing import Any, Optional
 
-from utils import gateway
-
-formatter = gateway.getSimpleDLFormatter()
+from utils import get_gateway
 
 
 class ConceptType(Enum):
@@ -18,6 +17,11 @@ class ConceptType(Enum):
     CONJUNCTION = "ConceptConjunction"
 
 
+@lru_cache(maxsize=None)
+def get_formatter() -> "JavaObject":
+    return get_gateway().getSimpleDLFormatter()
+
+
 class AxiomType(Enum):
     GCI = "GeneralConceptInclusion"
     EQUIVALENCE = "EquivalenceAxiom"
@@ -51,39 +55,103 @@ class BaseExpression:
         return hash(self._expr)
 
     def __str__(self) -> str:
-        return formatter.format(self._expr)
+        return get_formatter().format(self._expr)
 
 
 class Concept(BaseExpression):
     @property
     def conjuncts(self) -> set["Concept"]:
         assert self.type == ConceptType.CONJUNCTION.value
-        return set(Concept(concept) for concept in self._expr.getConjuncts())
+        return set(type(self)(concept) for concept in self._expr.getConjuncts())
 
     @property
     def role(self) -> "Concept":
         assert self.type == ConceptType.EXISTENTIAL.value
-        return Concept(self._expr.role())
+        return type(self)(self._expr.role())
 
     @property
     def filler(self) -> "Concept":
         assert self.type == ConceptType.EXISTENTIAL.value
-        return Concept(self._expr.filler())
+        return type(self)(self._expr.filler())
 
 
 class Axiom(BaseExpression):
+    # what its concepts are wrapped in
+    concept: type[Concept] = Concept
+
     @property
     def rhs(self) -> Concept:
         assert self.type == AxiomType.GCI.value
-        return Concept(self._expr.rhs())
+        return self.concept(self._expr.rhs())
 
     @property
     def lhs(self) -> Concept:
         assert self.type == AxiomType.GCI.value
-        return Concept(self._expr.lhs())
+        return self.concept(self._expr.lhs())
+
+    def get_concepts(self) -> set[Concept]:
+        return set(self.concept(concept) for concept in self._expr.getConcepts())
+
+
+class Counted(BaseExpression):
+    """
+    Counts in `calls` the calls made over the gateway through any
+    of the counted expressions, only used with metrics on
+    """
+
+    calls: int = 0
+
+    @property
+    def type(self) -> str:
+        Counted.calls += 2
+        return super().type
+
+    def __eq__(self, __value: object) -> bool:
+        Counted.calls += 1
+        return super().__eq__(__value)
+
+    def __hash__(self) -> int:
+        Counted.calls += 1
+        return super().__hash__()
+
+    def __str__(self) -> str:
+        Counted.calls += 1
+        return super().__str__()
+
+
+class CountedConcept(Counted, Concept):
+    @property
+    def conjuncts(self) -> set[Concept]:
+        Counted.calls += 1
+        return super().conjuncts
+
+    @property
+    def role(self) -> Concept:
+        Counted.calls += 1
+        return super().role
+
+    @property
+    def filler(self) -> Concept:
+        Counted.calls += 1
+        return super().filler
+
+
+class CountedAxiom(Counted, Axiom):
+    concept = CountedConcept
+
+    @property
+    def rhs(self) -> Concept:
+        Counted.calls += 1
+        return super().rhs
+
+    @property
+    def lhs(self) -> Concept:
+        Counted.calls += 1
+        return super().lhs
 
     def get_concepts(self) -> set[Concept]:
-        return set(Concept(concept) for concept in self._expr.getConcepts())
+        Counted.calls += 1
+        return super().get_concepts()
 
 
 class ELFactory:
@@ -104,7 +172,7 @@ class ELFactory:
     def __new__(cls, *args, **kwargs) -> "ELFactory":
         if not cls._instance:
             cls._instance = super().__new__(cls, *args, **kwargs)
-            cls._instance._el_factory = gateway.getELFactory()
+            cls._instance._el_factory = get_gateway().getELFactory()
         return cls._instance
 
     def get_gci(self, A: Concept, B: Concept) -> Axiom:
@@ -0,0 +1,232 @@
+"""
+Modules of the normalized TBox, so a query only saturates with the
+axioms that can matter for it.
+
+The module of a signature Σ (concept names and roles) is its ⊥-locality
+module: a normalized GCI is in it as soon as every symbol of its
+left-hand side is in Σ, and then the symbols of its right-hand side are
+added to Σ, until nothing changes. Any other GCI has a left-hand side no
+individual built from Σ can get, so all the subsumers of concepts over
+Σ follow from the module alone. In EL this is plain reachability:
+
+    A ⊑ B, A ⊑ ∃r.B     needs A
+    A1 ⊓ A2 ⊑ B         needs A1 and A2
+    ∃r.A ⊑ B            needs r and A
+
+⊤ is in every signature, so GCIs with ⊤ on the left are in every module.
+
+The input concepts of a module are the concepts of its GCIs, plus the
+existentials ∃r.A of the TBox with r and A in the module's signature:
+∃-rule 2 can build those without any GCI of the module. With them, the
+label of an individual saturated within the module is the same as with
+the whole TBox, so the saturation cache can be shared.
+"""
+
+import logging
+from collections import OrderedDict, defaultdict
+from typing import DefaultDict, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from utils.index import ConceptIndex
+from utils.models import ConceptType
+from utils.tbox import TBox
+from utils.terms import GCI, TOP, RoleId, TermId, TermTable
+
+logger = logging.getLogger(__name__)
+
+Signature = Tuple[FrozenSet[TermId], FrozenSet[RoleId]]
+
+# modules with more of the GCIs than this are not worth restricting to
+MAX_RATIO = 0.5
+
+
+class Module:
+    """
+    - `signature` is the one the module was extracted for
+    - `gcis` are the normalized GCIs in the module
+    - `concepts` are the input concepts of a model restricted to it,
+    see above, along with the names of the signature and ⊤
+    - `index` is the `ConceptIndex` over `concepts`
+    """
+
+    signature: Signature
+    gcis: FrozenSet[GCI]
+    concepts: Set[TermId]
+    index: ConceptIndex
+
+    def __init__(
+        self,
+        terms: TermTable,
+        signature: Signature,
+        gcis: FrozenSet[GCI],
+        concepts: Set[TermId],
+    ) -> None:
+        self.signature = signature
+        self.gcis = gcis
+        self.concepts = concepts
+        self.index = ConceptIndex(terms, concepts)
+
+    def __len__(self) -> int:
+        return len(self.gcis)
+
+
+class ModuleExtractor:
+    """
+    Extracts the modules of `tbox`, keeping the last `maxsize` of them by
+    signature. `refresh` has to be called once the TBox changed.
+
+    Each normalized GCI counts the symbols of its left-hand side not in Σ
+    yet, so extracting a module only goes over the GCIs it reaches. The
+    symbols of the right-hand sides and the concepts of each GCI are
+    computed once, when indexing.
+    """
+
+    terms: TermTable
+    tbox: TBox
+    maxsize: int
+
+    _gcis: List[GCI]
+    _required: List[int]
+    _rhs_symbols: List[Signature]
+    _concepts: List[FrozenSet[TermId]]
+    _by_concept: DefaultDict[TermId, List[int]]
+    _by_role: DefaultDict[RoleId, List[int]]
+    _unconditional: List[int]
+    _existentials: DefaultDict[TermId, List[Tuple[RoleId, TermId]]]
+    _modules: "OrderedDict[Signature, Optional[Module]]"
+
+    log: logging.Logger
+
+    def __init__(self, tbox: TBox, maxsize: int = 256) -> None:
+        self.terms = tbox.terms
+        self.tbox = tbox
+        self.maxsize = maxsize
+        self._modules = OrderedDict()
+
+        self.log = logger.getChild("ModuleExtractor")
+
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Index the normalized GCIs again, and forget all the modules"""
+        terms = self.terms
+
+        self._gcis = sorted(self.tbox.normalized)
+        self._required = []
+        self._rhs_symbols = []
+        self._concepts = []
+        self._by_concept = defaultdict(list)
+        self._by_role = defaultdict(list)
+        self._unconditional = []
+        self._existentials = defaultdict(list)
+        self._modules.clear()
+
+        for i, (lhs, rhs) in enumerate(self._gcis):
+            concepts, roles = self.symbols(lhs)
+            for concept in concepts:
+                self._by_concept[concept].append(i)
+            for role in roles:
+                self._by_role[role].append(i)
+
+            self._required.append(len(concepts) + len(roles))
+            if not concepts and not roles:
+                self._unconditional.append(i)
+
+            self._rhs_symbols.append(self.symbols(rhs))
+            self._concepts.append(frozenset(terms.subterms(lhs) | terms.subterms(rhs)))
+
+        # by filler
+        for concept in self.tbox.signature:
+            if terms.kinds[concept] is ConceptType.EXISTENTIAL:
+                self._existentials[terms.fillers[concept]].append(
+                    (terms.roles[concept], concept)
+                )
+
+    def symbols(self, concept: TermId) -> Signature:
+        """Concept names (fresh ones included) and roles in `concept`"""
+        terms = self.terms
+        concepts, roles = set(), set()
+        for term in terms.subterms(concept):
+            kind = terms.kinds[term]
+            if kind is ConceptType.NAME:
+                concepts.add(term)
+            elif kind is ConceptType.EXISTENTIAL:
+                roles.add(terms.roles[term])
+        return frozenset(concepts), frozenset(roles)
+
+    def signature(self, concepts: Iterable[TermId]) -> Signature:
+        names, roles = set(), set()
+        for concept in concepts:
+            concept_names, concept_roles = self.symbols(concept)
+            names |= concept_names
+            roles |= concept_roles
+        return frozenset(names), frozenset(roles)
+
+    def extract(self, concepts: Iterable[TermId]) -> Optional[Module]:
+        """The module for the signature of `concepts`, `None` if it has
+        more than `MAX_RATIO` of the GCIs. Complex concepts among `concepts`
+        are not made input concepts of the module, which only depends on
+        the signature.
+        """
+        signature = self.signature(concepts)
+
+        if signature in self._modules:
+            self._modules.move_to_end(signature)
+            return self._modules[signature]
+
+        required = self._required
+        names, roles = set(), set()
+        missing = {}
+        included = list(self._unconditional)
+        pending = list(included)
+
+        def reach(
+            symbols: Iterable[int],
+            reached: Set[int],
+            by_symbol: Dict[int, List[int]],
+        ) -> None:
+            for symbol in symbols:
+                if symbol in reached:
+                    continue
+                reached.add(symbol)
+                for i in by_symbol.get(symbol, ()):
+                    missing[i] = missing.get(i, required[i]) - 1
+                    if not missing[i]:
+                        included.append(i)
+                        pending.append(i)
+
+        # past that, the module is dropped anyway
+        limit = MAX_RATIO * len(self._gcis)
+
+        reach(signature[0], names, self._by_concept)
+        reach(signature[1], roles, self._by_role)
+        while pending and len(included) <= limit:
+            rhs_names, rhs_roles = self._rhs_symbols[pending.pop()]
+            reach(rhs_names, names, self._by_concept)
+            reach(rhs_roles, roles, self._by_role)
+
+        module = None
+        if len(included) <= limit:
+            input_concepts = {TOP, *signature[0]}
+            input_concepts.update(*(self._concepts[i] for i in included))
+            for filler in (TOP, *names):
+                for role, existential in self._existentials.get(filler, ()):
+                    if role in roles:
+                        input_concepts.add(existential)
+
+            module = Module(
+                self.terms,
+                signature,
+                frozenset(self._gcis[i] for i in included),
+                input_concepts,
+            )
+
+        self._modules[signature] = module
+        if len(self._modules) > self.maxsize:
+            self._modules.popitem(last=False)
+
+        self.log.debug(
+            f"Module of {len(included)} out of {len(self._gcis)} GCIs"
+            + ("" if module is not None else ", too big to restrict to")
+        )
+
+        return module
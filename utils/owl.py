@@ -0,0 +1,192 @@
+"""
+Gateway-free loader for ontologies in OWL/XML (.owx) syntax.
+
+The file is stream-parsed with `iterparse`, so each axiom is handled
+and released as soon as its closing tag is read. Only the EL fragment
+is kept:
+
+    - SubClassOf
+    - EquivalentClasses
+    - ObjectIntersectionOf (binarized, like `convertToBinaryConjunctions`)
+    - ObjectSomeValuesFrom
+    - Class, including owl:Thing as ⊤
+
+Axioms using anything else are skipped as a whole, the same way
+the dl4python parser drops axioms outside of EL, but the classes they
+use are still concept names.
+"""
+
+import logging
+import xml.etree.ElementTree as ET
+from typing import Optional, Tuple
+
+from utils.terms import TOP, TermId, TermTable
+
+logger = logging.getLogger(__name__)
+
+OWL = "{http://www.w3.org/2002/07/owl#}"
+
+THING = ("owl:Thing", "http://www.w3.org/2002/07/owl#Thing")
+
+# Parsed class expressions are nested tuples, only interned once
+# the whole axiom is known to be in EL:
+#   ("name", name) | ("top",) | ("and", e1, ..., en) | ("some", role, e)
+Expression = Tuple
+
+
+class NotEL(Exception):
+    pass
+
+
+class NotOWLXML(Exception):
+    pass
+
+
+def local_name(element: ET.Element) -> str:
+    """`#ForestDish`, `pancakes:ForestDish` and `http://.../pancakes#ForestDish`
+    are all named `ForestDish`
+    """
+    iri = element.get("IRI") or element.get("abbreviatedIRI")
+    if iri is None:
+        raise NotEL(f"{element.tag} without IRI")
+
+    for separator in ("#", "/", ":"):
+        iri = iri.rsplit(separator, 1)[-1]
+    return iri
+
+
+def parse_expression(element: ET.Element) -> Expression:
+    tag = element.tag
+
+    if tag == f"{OWL}Class":
+        iri = element.get("IRI") or element.get("abbreviatedIRI")
+        if iri in THING:
+            return ("top",)
+        return ("name", local_name(element))
+
+    if tag == f"{OWL}ObjectIntersectionOf":
+        return ("and", *(parse_expression(child) for child in element))
+
+    if tag == f"{OWL}ObjectSomeValuesFrom":
+        role, filler = list(element)
+        if role.tag != f"{OWL}ObjectProperty":
+            raise NotEL(f"{role.tag} as role")
+        return ("some", local_name(role), parse_expression(filler))
+
+    raise NotEL(tag)
+
+
+def intern_expression(terms: TermTable, expression: Expression) -> TermId:
+    kind = expression[0]
+
+    if kind == "top":
+        return TOP
+
+    if kind == "name":
+        return terms.add_name(expression[1])
+
+    if kind == "some":
+        return terms.add_existential(
+            terms.add_role(expression[1]), intern_expression(terms, expression[2])
+        )
+
+    # binarize the conjunction folding from the left: ((C1 ⊓ C2) ⊓ C3) ...
+    conjuncts = list(dict.fromkeys(intern_expression(terms, e) for e in expression[1:]))
+    conjunction = conjuncts[0]
+    for conjunct in conjuncts[1:]:
+        conjunction = terms.add_conjunction(conjunction, conjunct)
+    return conjunction
+
+
+def add_class_names(terms: TermTable, element: ET.Element) -> None:
+    """Add the names of the classes used anywhere in `element`"""
+    for entity in element.iter(f"{OWL}Class"):
+        iri = entity.get("IRI") or entity.get("abbreviatedIRI")
+        if iri is not None and iri not in THING:
+            terms.add_name(local_name(entity))
+
+
+def add_axiom(terms: TermTable, element: ET.Element) -> bool:
+    """Add an axiom to `terms` if it is in EL, returns whether it was"""
+    try:
+        expressions = [
+            parse_expression(child)
+            for child in element
+            if child.tag != f"{OWL}Annotation"
+        ]
+    except (NotEL, ValueError) as e:
+        logger.debug(f"Ignoring axiom not in EL ({e})")
+        # its classes are still declared by using them, like with the gateway
+        add_class_names(terms, element)
+        return False
+
+    concepts = [intern_expression(terms, e) for e in expressions]
+
+    if element.tag == f"{OWL}SubClassOf":
+        terms.add_gci(*concepts)
+    else:
+        terms.add_equivalence(*concepts)
+
+    return True
+
+
+def load_owx(
+    file_name: str,
+    terms: Optional[TermTable] = None,
+) -> TermTable:
+    """Stream-parse an OWL/XML file into a `TermTable`.
+
+    Raises `NotOWLXML` for anything else (RDF/XML, functional syntax...),
+    which only the gateway can read.
+    """
+    if terms is None:
+        terms = TermTable()
+
+    axioms = (f"{OWL}SubClassOf", f"{OWL}EquivalentClasses")
+    hint = "load it through the Java gateway instead (--gateway)"
+    root = None
+    depth = 0
+    added = skipped = 0
+
+    events = ET.iterparse(file_name, events=("start", "end"))
+    while True:
+        try:
+            event, element = next(events)
+        except StopIteration:
+            break
+        except ET.ParseError as e:
+            raise NotOWLXML(f"{file_name} is not in OWL/XML syntax ({e}), {hint}")
+
+        if event == "start":
+            if root is None:
+                if element.tag != f"{OWL}Ontology":
+                    raise NotOWLXML(
+                        f"{file_name} is not in OWL/XML syntax "
+                        f"(root element {element.tag}), {hint}"
+                    )
+                root = element
+            depth += 1
+            continue
+
+        depth -= 1
+        # only direct children of <Ontology> are axioms
+        if depth != 1:
+            continue
+
+        if element.tag in axioms:
+            if add_axiom(terms, element):
+                added += 1
+            else:
+                skipped += 1
+
+        else:
+            # declarations, and the classes of other axioms (disjointness,
+            # assertions...) which are not in EL either
+            add_class_names(terms, element)
+
+        # drop what has been read so far, memory stays bounded by one axiom
+        root.clear()
+
+    logger.info(f"Loaded {added} EL axioms from {file_name}, skipped {skipped}")
+
+    return terms
@@ -1,152 +1,874 @@
 import logging
+import os
 from collections import defaultdict
-from typing import Any, DefaultDict, List, Optional, Set
-
-from utils.model import Model
-from utils.models import Axiom, Concept, ELFactory
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from typing import (
+    Any,
+    Callable,
+    DefaultDict,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from utils.batch import group_by_subsumee, read_pairs
+from utils.bitset import Bitset
+from utils.cache import SaturationCache
+from utils.graph import strongly_connected_components
+from utils.index import ConceptIndex
+from utils.metrics import Metrics
+from utils.model import Model, model_class
+from utils.models import ConceptType, Counted
+from utils.module import ModuleExtractor
+from utils.store import write_hierarchy
+from utils.taxonomy import Taxonomy
 from utils.tbox import TBox
+from utils.terms import TOP, Equivalence, TermId, TermTable
+from utils.trace import Lazy, Tracer
 
 logger = logging.getLogger(__name__)
 
-el_factory = ELFactory()
-top = el_factory.get_top()
+
+class Strategy(Enum):
+    """How `ELReasoner.classify` computes the hierarchy
+
+    - PER_CONCEPT: one model per concept name with `fill_all_subsumers`
+
+    - SATURATION: one shared model with an individual per concept name
+    (and per existential filler), saturated once for the whole ontology
+
+    - PARALLEL: the concept names are split across worker processes,
+    each saturating a shared model for its share of them
+
+    - TRAVERSAL: one model per concept name like PER_CONCEPT, but going
+    down the told hierarchy so each one starts from the label of a told
+    subsumer, see `traverse_told_hierarchy`
+    """
+
+    PER_CONCEPT = "per-concept"
+    SATURATION = "saturation"
+    PARALLEL = "parallel"
+    TRAVERSAL = "traversal"
+
+
+def invalid_class_name(concept: str | TermId) -> str:
+    return (
+        f"Invalid class name {concept}. "
+        'Maybe you forgot the " "? Or maybe it\'s better without them?'
+    )
+
+
+# reasoner of each worker process in parallel classification,
+# built once per process from the term table
+_worker_reasoner: Optional["ELReasoner"] = None
+
+
+def _init_worker(terms: TermTable, naive: bool) -> None:
+    global _worker_reasoner
+    _worker_reasoner = ELReasoner(terms, naive=naive)
+
+
+def _classify_chunk(
+    concepts: List[TermId],
+) -> Tuple[Dict[TermId, Set[TermId]], int]:
+    """Subsumers of `concepts`, and the rule firings it took"""
+    firings = _worker_reasoner.firings
+    _worker_reasoner.saturate_all(concepts)
+    return (
+        {concept: _worker_reasoner.hierarchy[concept] for concept in concepts},
+        _worker_reasoner.firings - firings,
+    )
 
 
 class ELReasoner:
+    """
+    The ontology is snapshotted once into a `TermTable`, and all the
+    reasoning is done over its IDs. Names are only translated back
+    for output.
+
+    `ontology` is either a dl4python ontology or a `TermTable` that
+    has already been loaded, e.g. with `utils.owl.load_owx`.
+
+    The input concepts are the concept names and the concepts of the
+    normalized TBox (see `utils.tbox`), fresh names included. Other complex
+    concepts are only added to the models of the queries that mention them.
+
+    With `naive` the models apply the rules with the original
+    loop over all individuals instead of the worklist.
+
+    With `goal_directed`, `is_subsumed_by` stops saturating as soon as
+    the subsumer is derived (see `Model`), instead of reaching the fixpoint.
+    It pays off when positive answers come quickly, e.g. from told chains;
+    individuals left incomplete are not cached though, so queries over
+    large cycles of existentials can end up re-deriving more.
+
+    With `modules`, the models of single queries only get the input
+    concepts of the module of the query's signature (see `utils.module`),
+    unless it is about as big as the whole TBox.
+
+    Saturated individuals are kept in `cache` across queries, keyed by
+    initial concept, holding at most `cache_size` of them (unbounded
+    with `None`, disabled with 0).
+
+    After classifying with `Strategy.SATURATION` the shared `model` is kept,
+    so axioms added or removed later only update the affected part of it
+    and of the `hierarchy`.
+
+    `firings` adds up the rule firings of all the models built for this
+    reasoner (see `Model.firings`), in the worker processes as well.
+
+    With `metrics`, all the models report to one `Metrics`, returned by
+    `get_metrics`. The worker processes of `Strategy.PARALLEL` are
+    not profiled.
+
+    `tracer` is given to all the models, see `utils.trace`.
+    """
+
+    terms: TermTable
     tbox: TBox
-    concepts: Set[Concept]
-    concept_names: Set[Concept]
+    concepts: Set[TermId]
+    concept_names: Set[TermId]
+    index: ConceptIndex
 
-    hierarchy: DefaultDict[Concept, Set[Concept]]
+    hierarchy: DefaultDict[TermId, Set[TermId]]
+    equivalents: Dict[TermId, FrozenSet[TermId]]
+    taxonomy: Optional[Taxonomy]
     is_classified: bool
+    naive: bool
+    goal_directed: bool
+    cache: Optional[SaturationCache]
+    modules: Optional[ModuleExtractor]
+    model: Optional[Model]
+    firings: int
+    metrics: Optional[Metrics]
+    tracer: Optional[Tracer]
+    _gateway_calls: int
 
     log: logging.Logger
 
-    def __init__(self, ontology: Any) -> None:
-        self.tbox = TBox(set(Axiom(axiom) for axiom in ontology.tbox().getAxioms()))
-        self.concepts = set(Concept(c) for c in ontology.getSubConcepts())
-        self.concept_names = set(Concept(c) for c in ontology.getConceptNames())
+    def __init__(
+        self,
+        ontology: Any,
+        naive: bool = False,
+        cache_size: Optional[int] = 4096,
+        metrics: bool = False,
+        tracer: Optional[Tracer] = None,
+        goal_directed: bool = False,
+        modules: bool = False,
+    ) -> None:
+        self._gateway_calls = Counted.calls
+        self.terms = (
+            ontology
+            if isinstance(ontology, TermTable)
+            else TermTable.from_ontology(ontology, count_calls=metrics)
+        )
+        self.tbox = TBox(self.terms)
+        # complex concepts only matter through the normalized axioms
+        self.concepts = self.tbox.signature | self.terms.concept_names | {TOP}
+        self.concept_names = self.terms.concept_names
+        self.index = ConceptIndex(self.terms, self.concepts)
 
         self.hierarchy = defaultdict(set)
+        self.equivalents = {}
+        self.taxonomy = None
         self.is_classified = False
+        self.naive = naive
+        self.goal_directed = goal_directed
+        self.cache = SaturationCache(cache_size) if cache_size != 0 else None
+        self.modules = ModuleExtractor(self.tbox) if modules else None
+        self.model = None
+        self.firings = 0
+        self.metrics = Metrics() if metrics else None
+        self.tracer = tracer
 
         self.log = logger.getChild("ELReasoner")
 
     def validate_concepts(
         self,
-        *concepts: str | Concept,
-    ) -> List[Concept]:
+        *concepts: str | TermId,
+    ) -> List[TermId]:
         output = []
         for concept in concepts:
             if isinstance(concept, str):
-                concept = el_factory.get_concept_name(concept)
+                concept = self.terms.get_name(concept)
             output.append(concept)
 
-        assert (
-            set(output) <= self.concepts
-        ), f"Some of the concepts in {list(str(c) for c in output)} are invalid."
+        assert all(
+            c is not None and 0 <= c < len(self.terms) for c in output
+        ), f"Some of the concepts in {list(str(c) for c in concepts)} are invalid."
 
-        return output
+        # wider conjunctions can't be built by the rules, see `ConceptIndex`
+        return [self.terms.binarize(c) for c in output]
 
     def validate_concept(
         self,
-        concept: str | Concept,
-    ) -> Concept:
+        concept: str | TermId,
+    ) -> TermId:
         try:
             return self.validate_concepts(concept)[0]
         except AssertionError:
-            msg = f'Invalid class name {concept}. Maybe you forgot the " "? Or maybe it\'s better without them?'
-            raise AssertionError(msg)
+            raise AssertionError(invalid_class_name(concept))
 
     def is_subsumed_by(
         self,
-        subsumee: str | Concept,
-        subsumer: str | Concept,
+        subsumee: str | TermId,
+        subsumer: str | TermId,
     ) -> bool:
         self.log.info(f"Trying to find a model for O |= {subsumee} ⊑ {subsumer}\n\n")
 
         subsumee, subsumer = self.validate_concepts(subsumee, subsumer)
 
-        model = self.build_model(subsumee=subsumee, subsumer=subsumer)
+        model = self.build_model(
+            subsumee=subsumee, subsumer=subsumer, goal_directed=self.goal_directed
+        )
         result = model.apply_rules()
+        self.firings += model.firings
 
         self.log_results(subsumee, subsumer, result)
 
         return result
 
-    def classify(self) -> None:
-        for concept in self.concept_names:
-            self.fill_all_subsumers(concept)
+    def check_subsumptions(
+        self,
+        pairs: Iterable[Tuple[str | TermId, str | TermId]],
+    ) -> Iterator[Tuple[str | TermId, str | TermId, bool]]:
+        """Whether O |= `subsumee` ⊑ `subsumer` for each pair, as
+        `(subsumee, subsumer, result)`.
+
+        Pairs are grouped by subsumee, so results come grouped by
+        subsumee as well: each subsumee is saturated once (or its row
+        of the hierarchy is used if classified) and all of its subsumers
+        are checked against that.
+
+        Pairs with a concept that isn't valid (e.g. an unknown class name)
+        are skipped with a warning, the others are still checked.
+        """
+        for subsumee, group in group_by_subsumee(pairs).items():
+            try:
+                concept = self.validate_concept(subsumee)
+            except AssertionError as e:
+                self.log.warning(f"Skipping {len(group)} pairs of {subsumee}: {e}")
+                continue
+
+            subsumers, checks = [], []
+            for subsumer in group:
+                try:
+                    checks.append(self.validate_concept(subsumer))
+                except AssertionError as e:
+                    self.log.warning(f"Skipping ({subsumee}, {subsumer}): {e}")
+                    continue
+                subsumers.append(subsumer)
+
+            if self.is_classified and self.concept_names.issuperset((concept, *checks)):
+                label = self.hierarchy[concept]
+            else:
+                label = self.get_label(concept, checks)
+
+            for subsumer, check in zip(subsumers, checks):
+                yield subsumee, subsumer, check in label
+
+    def check_subsumptions_from_file(
+        self,
+        file_name: str,
+    ) -> Iterator[Tuple[str | TermId, str | TermId, bool]]:
+        """`check_subsumptions` for the pairs of class names
+        in `file_name`, see `utils.batch.read_pairs`. Pairs with
+        unknown names are skipped, see `check_subsumptions`.
+        """
+        return self.check_subsumptions(read_pairs(file_name))
+
+    def get_label(
+        self,
+        concept: str | TermId,
+        queried: Iterable[TermId] = (),
+    ) -> Bitset:
+        """All the input concepts subsuming `concept`, from the label
+        of its individual (taken from the cache if it is there).
+
+        The label is complete for the concepts in `queried` as well,
+        even if they are not input concepts.
+        """
+        model = self.build_model(
+            subsumee=self.validate_concept(concept), queried=queried
+        )
+        model.apply_rules()
+        self.firings += model.firings
+
+        return model.initial_individual.concepts
 
+    def classify(
+        self,
+        strategy: Strategy | str = Strategy.SATURATION,
+        workers: Optional[int] = None,
+    ) -> None:
+        """`workers` is the number of processes with `Strategy.PARALLEL`,
+        all the cores by default
+        """
+        strategy = Strategy(strategy)
+
+        if strategy is Strategy.SATURATION:
+            self.saturate_all()
+        elif strategy is Strategy.PARALLEL:
+            self.saturate_parallel(workers)
+        elif strategy is Strategy.TRAVERSAL:
+            self.traverse_told_hierarchy()
+        else:
+            for concept in self.concept_names:
+                self.fill_all_subsumers(concept)
+
+        self.close_hierarchy(self.concept_names)
+        self.taxonomy = None
         self.is_classified = True
 
+    def saturate_parallel(self, workers: Optional[int] = None) -> None:
+        """Split the concept names in one chunk per worker process, each
+        saturated with a shared model, and merge their subsumers into
+        the hierarchy.
+
+        Chunks are contiguous ranges of `connected_order`, so concepts
+        sharing told subsumers and fillers mostly end up in the same
+        chunk, and those are not saturated again in every chunk.
+
+        Workers only get the term table, so they never need a gateway.
+        """
+        workers = workers or os.cpu_count() or 1
+        self.log.info(f"Classifying with {workers} worker processes\n\n")
+
+        concepts = self.connected_order()
+        n_chunks = min(len(concepts), workers) or 1
+        size = -(-len(concepts) // n_chunks)
+        chunks = [concepts[i : i + size] for i in range(0, len(concepts), size)]
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.terms, self.naive),
+        ) as executor:
+            for subsumers, firings in executor.map(_classify_chunk, chunks):
+                self.firings += firings
+                for concept, concept_subsumers in subsumers.items():
+                    self.hierarchy[concept] |= concept_subsumers
+
+        self.log.info("Hierarchy has been computed")
+
+    def connected_order(self) -> List[TermId]:
+        """The concept names in post-order of a depth-first search along
+        what their models need (see `TBox.told`): their told subsumers,
+        and the fillers of the existentials among those, which become
+        individuals. A concept comes right after most of what it needs,
+        so a contiguous range of the order shares most of its fillers.
+        """
+        terms = self.terms
+
+        def needs(atom: TermId) -> List[TermId]:
+            needed = []
+            for concept in self.tbox.superclasses(atom):
+                if terms.kinds[concept] is ConceptType.EXISTENTIAL:
+                    concept = terms.fillers[concept]
+                if concept != atom and terms.kinds[concept] is ConceptType.NAME:
+                    needed.append(concept)
+            return needed
+
+        order = []
+        reached = set()
+        for root in sorted(self.concept_names):
+            if root in reached:
+                continue
+            reached.add(root)
+            stack = [(root, iter(needs(root)))]
+            while stack:
+                atom, pending = stack[-1]
+                for needed in pending:
+                    if needed not in reached:
+                        reached.add(needed)
+                        stack.append((needed, iter(needs(needed))))
+                        break
+                else:
+                    stack.pop()
+                    if atom in self.concept_names:
+                        order.append(atom)
+
+        return order
+
+    def saturate_all(self, concepts: Optional[Iterable[TermId]] = None) -> None:
+        """Consequence-based classification: all the concept names share
+        one model, so individuals such as shared fillers are saturated
+        only once, and the whole hierarchy is read from it.
+
+        With `concepts`, only those get an individual of their own.
+        """
+        concepts = self.concept_names if concepts is None else set(concepts)
+
+        self.log.info("Classifying with a single shared model\n\n")
+
+        model = model_class(self.metrics, self.tracer)(
+            terms=self.terms,
+            input_concepts=self.concepts,
+            tbox=self.tbox,
+            naive=self.naive,
+            index=self.index,
+            cache=self.cache,
+            metrics=self.metrics,
+            tracer=self.tracer,
+        )
+        model.initialize_classification(concepts)
+        model.run()
+        self.firings += model.firings
+
+        names = Bitset(self.concept_names)
+        for concept in concepts:
+            self.hierarchy[concept] = set(
+                model.find_individual(concept).concepts & names
+            )
+
+        if concepts == self.concept_names:
+            self.model = model
+
+        self.log.info("Hierarchy has been computed")
+
+    def traverse_told_hierarchy(self) -> None:
+        """Compute the subsumers of the concept names top-down along the
+        told hierarchy (`TBox.told`), so the labels of the told subsumers
+        of a concept are known before it is done:
+
+            - concepts in a told cycle are equivalent, they have the same
+            label, computed once for the whole cycle
+
+            - the model of a concept starts with the label of its told
+            subsumer with the largest one (see `Model.inherit`), instead
+            of deriving it all over again
+
+            - a concept only told to be subsumed by concepts in that label,
+            and in no input conjunction, has nothing more to derive: its
+            label is taken as it is, without building a model
+
+        Labels are only kept until the traversal is over.
+        """
+        self.log.info("Classifying along the told hierarchy\n\n")
+
+        names = self.concept_names
+        told = {
+            concept: [c for c in self.tbox.superclasses(concept) if c in names]
+            for concept in names
+        }
+        # told subsumers first
+        components = strongly_connected_components(
+            sorted(names), lambda concept: told[concept]
+        )
+
+        labels: Dict[TermId, Bitset] = {}
+        skipped = 0
+        for component in components:
+            members = set(component)
+            told_names = set().union(*(told[c] for c in component))
+            candidates = told_names - members
+
+            parent = max(candidates, key=lambda c: len(labels[c]), default=None)
+            inherited = labels[parent] if parent is not None else None
+
+            told_concepts = set().union(*(self.tbox.superclasses(c) for c in component))
+            if (
+                inherited is not None
+                and all(c in inherited or c in members for c in told_concepts)
+                and not any(c in self.index.conjunctions for c in component)
+            ):
+                label = inherited | members
+                skipped += len(component)
+            else:
+                model = self.build_model(subsumee=component[0])
+                if not model.initial_individual.saturated and inherited is not None:
+                    model.inherit(model.initial_individual, inherited)
+                model.apply_rules()
+                self.firings += model.firings
+
+                label = model.initial_individual.concepts
+                skipped += len(component) - 1
+
+            subsumers = set(c for c in label if c in names)
+            for concept in component:
+                labels[concept] = label
+                self.hierarchy[concept] = subsumers.copy()
+
+        self.log.info(
+            f"Hierarchy has been computed, {skipped} out of {len(names)} "
+            "concept names without a model of their own"
+        )
+
+    def _intern_axioms(
+        self,
+        axioms: Iterable[Sequence[str | TermId]],
+    ) -> List[Equivalence]:
+        """Concepts given by name are added to the term table if new"""
+        return [
+            tuple(self.terms.add_name(c) if isinstance(c, str) else c for c in axiom)
+            for axiom in axioms
+        ]
+
+    def _find_axioms(
+        self,
+        axioms: Iterable[Sequence[str | TermId]],
+    ) -> List[Equivalence]:
+        """Concepts given by name are looked up, never added: axioms with
+        a name not in the term table can't be in the TBox, they are skipped
+        """
+        found = []
+        for axiom in axioms:
+            concepts = tuple(
+                self.terms.get_name(c) if isinstance(c, str) else c for c in axiom
+            )
+            if None in concepts:
+                self.log.warning(f"Skipping {axiom}, not all of its names are known")
+                continue
+            found.append(concepts)
+        return found
+
+    def _register_new_terms(self) -> List[TermId]:
+        """Make the names, and the concepts of the normalized axioms,
+        added since the last call input concepts
+        """
+        new_terms = sorted(
+            (self.tbox.signature | self.terms.concept_names) - self.concepts
+        )
+
+        for concept in new_terms:
+            self.concepts.add(concept)
+            self.index.add_concept(self.terms, concept)
+        self.concept_names |= set(
+            c
+            for c in new_terms
+            if self.terms.kinds[c] is ConceptType.NAME and c not in self.terms.fresh
+        )
+
+        return new_terms
+
+    def add_axioms(
+        self,
+        gcis: Iterable[Sequence[str | TermId]] = (),
+        equivalences: Iterable[Sequence[str | TermId]] = (),
+    ) -> None:
+        """Add GCIs `(lhs, rhs)` and equivalences `(C, D, ...)`.
+
+        If the shared model of the classification is there, saturation
+        continues from it: the facts the new axioms and new input concepts
+        can fire on are queued again, and only the rows of the hierarchy
+        whose labels grew are updated.
+        """
+        gcis = self._intern_axioms(gcis)
+        equivalences = self._intern_axioms(equivalences)
+
+        added = self.tbox.add_axioms(gcis, equivalences)
+        new_terms = self._register_new_terms()
+        self.log.info(f"Added {len(added)} normalized GCIs")
+
+        # facts that can fire the new axioms, and the new conjunctions
+        # and existentials in ⊓-rule 2 and ∃-rule 2
+        triggers = set(lhs for lhs, _ in added)
+        for concept in new_terms:
+            triggers |= set(self.terms.conjuncts[concept])
+            if self.terms.fillers[concept] is not None:
+                triggers.add(self.terms.fillers[concept])
+
+        self._update(lambda model: model.refire(triggers))
+
+    def remove_axioms(
+        self,
+        gcis: Iterable[Sequence[str | TermId]] = (),
+        equivalences: Iterable[Sequence[str | TermId]] = (),
+    ) -> None:
+        """Remove GCIs `(lhs, rhs)` and equivalences `(C, D, ...)`.
+
+        With the shared model of the classification, the individuals that
+        could have used the removed axioms are over-deleted and re-derived,
+        and only their rows of the hierarchy are updated.
+        """
+        gcis = self._find_axioms(gcis)
+        equivalences = self._find_axioms(equivalences)
+
+        if self.model is not None:
+            # cached individuals need their successors before over-deleting
+            firings = self.model.firings
+            for individual in tuple(self.model.individuals):
+                self.model.expand(individual)
+            self.model.saturate()
+            self.firings += self.model.firings - firings
+
+        removed = self.tbox.remove_axioms(gcis, equivalences)
+        self.log.info(f"Removed {len(removed)} normalized GCIs")
+
+        triggers = set(lhs for lhs, _ in removed)
+        self._update(lambda model: model.retract(triggers))
+
+    def _update(self, change: Callable[[Model], Any]) -> None:
+        """Bring the hierarchy up to date after the TBox changed"""
+        if self.cache is not None:
+            self.cache.clear()
+        if self.modules is not None:
+            self.modules.refresh()
+        self.taxonomy = None
+
+        if self.model is None:
+            # nothing to continue from, the hierarchy is computed again on demand
+            self.hierarchy.clear()
+            self.equivalents.clear()
+            self.is_classified = False
+            return
+
+        model = self.model
+        firings = model.firings
+        before = {}
+        for concept in self.concept_names:
+            individual = model.find_individual(concept)
+            if individual is not None:
+                before[concept] = individual.concepts.bits
+            else:
+                model.get_individual(concept)
+
+        change(model)
+        model.saturate()
+        self.firings += model.firings - firings
+
+        names = Bitset(self.concept_names)
+        updated = 0
+        for concept in self.concept_names:
+            label = model.find_individual(concept).concepts
+            if before.get(concept) != label.bits:
+                self.hierarchy[concept] = set(label & names)
+                updated += 1
+
+        self.log.info(f"{updated} rows of the hierarchy have been updated")
+
+        if updated:
+            self.close_hierarchy(self.concept_names)
+
     def get_subsumers(
         self,
-        subsumee: str | Concept,
+        subsumee: str | TermId,
         print_output: bool = True,
+        direct: bool = False,
     ) -> None:
+        """With `direct`, only the direct subsumers are printed,
+        which needs the whole ontology classified
+        """
         subsumee = self.validate_concept(subsumee)
 
-        if not self.is_classified:
+        if direct:
+            self.get_taxonomy()
+        elif not self.is_classified:
             self.fill_all_subsumers(subsumee)
 
         if print_output:
-            self.print_subsumers(subsumee)
+            self.print_subsumers(subsumee, direct=direct)
+
+    def subsumers_of(self, concept: str | TermId, direct: bool = False) -> Set[TermId]:
+        """Subsumers of `concept` among the concept names, or only the
+        direct ones with `direct` (which classifies first, if needed).
+
+        Unlike `get_subsumers`, nothing is added to `hierarchy` unless the
+        ontology is classified already: the label of `concept` comes from
+        its model, or from the saturation cache. Asking for the subsumers
+        of many concepts in a row then takes no more memory than the cache.
+        """
+        concept = self.validate_concept(concept)
+
+        if direct:
+            return self.get_taxonomy().direct_subsumers(concept)
+        if self.is_classified:
+            return self.hierarchy[concept]
+        return set(c for c in self.get_label(concept) if c in self.concept_names)
+
+    def get_taxonomy(self) -> Taxonomy:
+        """Direct subsumers and subsumees of the classified hierarchy,
+        classifying first if needed
+        """
+        if not self.is_classified:
+            self.classify()
+
+        if self.taxonomy is None:
+            self.taxonomy = Taxonomy(self.hierarchy, self.concept_names)
 
-    def print_subsumers(self, subsumee: Concept) -> None:
-        for subsumer in self.hierarchy[subsumee]:
+        return self.taxonomy
+
+    def get_metrics(self) -> Metrics:
+        """What the rules have done so far, `metrics` has to be on"""
+        assert self.metrics is not None, "Metrics are off, see `metrics`"
+
+        self.metrics.gateway_calls = Counted.calls - self._gateway_calls
+        return self.metrics
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Bytes taken by the model kept from classification, if any
+        (see `Model.memory_usage`), and by the saturation cache
+        """
+        return {
+            "model": self.model.memory_usage() if self.model is not None else None,
+            "cache_bytes": self.cache.nbytes() if self.cache is not None else 0,
+        }
+
+    def save_hierarchy(self, path: str) -> None:
+        """Save the hierarchy, classifying first if needed, so it can
+        be read back with `utils.store.HierarchyFile`
+        """
+        if not self.is_classified:
+            self.classify()
+
+        concepts = sorted(self.concept_names, key=lambda c: self.terms.names[c])
+        rows = {concept: i for i, concept in enumerate(concepts)}
+
+        write_hierarchy(
+            path,
+            names=[self.terms.names[c] for c in concepts],
+            labels=self.terms.format_all(concepts),
+            rows=[sorted(rows[s] for s in self.hierarchy[c]) for c in concepts],
+        )
+
+        self.log.info(f"Hierarchy saved to {path}")
+
+    def print_subsumers(self, subsumee: TermId, direct: bool = False) -> None:
+        subsumers = (
+            self.get_taxonomy().direct_subsumers(subsumee)
+            if direct
+            else self.hierarchy[subsumee]
+        )
+        for subsumer in sorted(self.terms.format_all(subsumers)):
             print(subsumer)
 
     def log_results(
         self,
-        subsumee: Concept,
-        subsumer: Concept,
+        subsumee: TermId,
+        subsumer: TermId,
         result: bool,
     ) -> None:
-        msg = (
-            f"{subsumee} IS subsumed by {subsumer}\n\n"
-            if result
-            else f"{subsumee} is NOT subsumed by {subsumer}"
+        self.log.info(
+            "%s IS subsumed by %s\n\n" if result else "%s is NOT subsumed by %s",
+            Lazy(self.terms.format, subsumee),
+            Lazy(self.terms.format, subsumer),
         )
-        self.log.info(msg)
 
     def build_model(
         self,
-        subsumee: Concept,
-        subsumer: Optional[Concept] = None,
+        subsumee: TermId,
+        subsumer: Optional[TermId] = None,
+        queried: Iterable[TermId] = (),
+        goal_directed: bool = False,
     ) -> Model:
-        if not subsumer:
-            subsumer = top
-
-        input_concepts = self.concepts | {subsumee, subsumer}
-        model = Model(input_concepts=input_concepts, axioms=self.tbox.normalized)
+        """With concepts in the query (`subsumee`, `subsumer` and `queried`)
+        that are not input concepts, e.g. complex concepts not in the
+        normalized TBox, they are added along with their sub-concepts,
+        so they can be decomposed and built by the rules.
+
+        A `goal_directed` model only runs until it has the subsumer.
+
+        With `modules`, the input concepts are the ones of the module of
+        the query instead.
+        """
+        if subsumer is None:
+            subsumer = TOP
+
+        queried = {subsumee, subsumer, *queried}
+        input_concepts, index, cache = self.concepts, self.index, self.cache
+        module = self.modules.extract(queried) if self.modules is not None else None
+        if module is not None:
+            input_concepts, index = module.concepts, module.index
+        if not queried <= input_concepts:
+            input_concepts = input_concepts.union(*map(self.terms.subterms, queried))
+            index = ConceptIndex(self.terms, input_concepts)
+            # cached labels are only complete for the usual input concepts
+            cache = None
+
+        model = model_class(self.metrics, self.tracer)(
+            terms=self.terms,
+            input_concepts=input_concepts,
+            tbox=self.tbox,
+            naive=self.naive,
+            index=index,
+            cache=cache,
+            metrics=self.metrics,
+            tracer=self.tracer,
+            goal_directed=goal_directed,
+        )
         model.initialize_model(subsumee=subsumee, subsumer=subsumer)
         return model
 
-    def compute_subsumers(self, subsumee: Concept) -> None:
-        self.log.info(f"Computing subsumers of {subsumee}\n\n")
+    def compute_subsumers(self, subsumee: TermId) -> None:
+        self.log.info(
+            "Computing subsumers of %s\n\n", Lazy(self.terms.format, subsumee)
+        )
 
         model = self.build_model(subsumee=subsumee)
         model.apply_rules()
+        self.firings += model.firings
 
         self.hierarchy[model.subsumee] |= set(
             c for c in model.initial_individual.concepts if (c in self.concept_names)
         )
 
-        self.log.info(f"Subsumers of {subsumee} have been added to hierarchy")
+        self.log.info(
+            "Subsumers of %s have been added to hierarchy",
+            Lazy(self.terms.format, subsumee),
+        )
 
-    def fill_all_subsumers(self, subsumee: Concept) -> None:
-        added = set()
+    def fill_all_subsumers(self, subsumee: TermId) -> None:
+        """Compute the subsumers of `subsumee`, and of all of its subsumers,
+        then close them under transitivity with `close_hierarchy`
+        """
+        reached = set()
+        pending = [subsumee]
 
-        if not self.hierarchy.get(subsumee):
-            self.compute_subsumers(subsumee=subsumee)
+        while pending:
+            concept = pending.pop()
+            if concept in reached:
+                continue
+            reached.add(concept)
 
-        for subsumer in self.hierarchy[subsumee]:
-            if not self.hierarchy.get(subsumer):
-                self.compute_subsumers(subsumee=subsumer)
+            if not self.hierarchy.get(concept):
+                self.compute_subsumers(subsumee=concept)
 
-            added |= self.hierarchy[subsumer] - self.hierarchy[subsumee]
+            pending.extend(self.hierarchy[concept] - reached)
 
-        self.hierarchy[subsumee] |= added
-        while added:
-            self.fill_all_subsumers(subsumee)
+        self.close_hierarchy(reached)
+
+    def close_hierarchy(self, concepts: Iterable[TermId]) -> None:
+        """Transitive closure of the hierarchy rows of `concepts`, which must
+        contain all the subsumers in their rows.
+
+        Strongly connected components are the classes of equivalent concepts,
+        each collapsed into one node. Components come in reverse topological
+        order, so one pass propagates subsumers from the top down.
+        """
+        components = strongly_connected_components(
+            concepts, lambda concept: self.hierarchy[concept]
+        )
+
+        component_of = {}
+        closures = []
+        for i, component in enumerate(components):
+            for concept in component:
+                component_of[concept] = i
+
+            closure = Bitset(component)
+            for concept in component:
+                for subsumer in self.hierarchy[concept]:
+                    # already in means its whole closure is in as well
+                    if subsumer not in closure:
+                        closure |= closures[component_of[subsumer]]
+            closures.append(closure)
+
+            equivalents = frozenset(component)
+            subsumers = set(closure)
+            for concept in component:
+                self.hierarchy[concept] = subsumers.copy()
+                self.equivalents[concept] = equivalents
+
+    def get_equivalents(self, concept: str | TermId) -> FrozenSet[TermId]:
+        """Concepts equivalent to `concept`, itself included"""
+        concept = self.validate_concept(concept)
+        if concept not in self.equivalents:
+            self.fill_all_subsumers(concept)
+        return self.equivalents[concept]
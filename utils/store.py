@@ -0,0 +1,192 @@
+"""
+On-disk cache of classification results.
+
+The hierarchy is saved in a compact binary file named after a content
+hash of the ontology, and read back memory-mapped, so a query only
+touches the rows it needs instead of deserializing everything.
+
+Layout (all integers are little-endian uint32):
+
+    MAGIC, n, names_pos, labels_pos, rows_pos
+
+    names at names_pos: n + 1 offsets, then the UTF-8 blob of the names
+    used for lookups, sorted so they can be binary-searched
+
+    labels at labels_pos: same layout, the names as they are printed
+
+    rows at rows_pos: n + 1 offsets, then for each row the indices of the
+    rows of its subsumers
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+from typing import BinaryIO, Iterable, List, Optional, Sequence, Tuple
+
+MAGIC = b"ELH\x01"
+
+HEADER = struct.Struct("<4sIIII")
+UINT = struct.Struct("<I")
+
+
+def fingerprint(file_name: str, *salt: str) -> str:
+    """Hash of the contents of `file_name`, plus anything that changes
+    how it is read (e.g. the parser used)
+    """
+    digest = hashlib.sha256(MAGIC)
+    for s in salt:
+        digest.update(s.encode("utf-8"))
+
+    with open(file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _write_uints(f: BinaryIO, values: Sequence[int]) -> None:
+    f.write(struct.pack(f"<{len(values)}I", *values))
+
+
+def _write_strings(f: BinaryIO, strings: Iterable[str]) -> None:
+    blobs = [s.encode("utf-8") for s in strings]
+
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    _write_uints(f, offsets)
+    f.write(b"".join(blobs))
+
+
+def write_hierarchy(
+    path: str,
+    names: Sequence[str],
+    labels: Sequence[str],
+    rows: Sequence[Sequence[int]],
+) -> None:
+    """`names` must be sorted, `rows[i]` are the indices of the subsumers
+    of `names[i]`. The file is written aside and moved in place, so readers
+    never see it half written.
+    """
+    assert list(names) == sorted(names), "Names must be sorted"
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+
+        names_pos = f.tell()
+        _write_strings(f, names)
+
+        labels_pos = f.tell()
+        _write_strings(f, labels)
+
+        rows_pos = f.tell()
+        offsets = [0]
+        for row in rows:
+            offsets.append(offsets[-1] + len(row))
+        _write_uints(f, offsets)
+        for row in rows:
+            _write_uints(f, row)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(names), names_pos, labels_pos, rows_pos))
+
+    os.replace(tmp_path, path)
+
+
+class InvalidHierarchyFile(Exception):
+    pass
+
+
+class HierarchyFile:
+    """Read-only, memory-mapped view of a file written by `write_hierarchy`"""
+
+    _file: BinaryIO
+    _mm: mmap.mmap
+    _n: int
+    _names_pos: int
+    _labels_pos: int
+    _rows_pos: int
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, n, names_pos, labels_pos, rows_pos = HEADER.unpack_from(self._mm)
+        except (ValueError, struct.error) as e:
+            self._file.close()
+            raise InvalidHierarchyFile(f"{path} is not a hierarchy file") from e
+
+        if magic != MAGIC or not self._complete(n, rows_pos):
+            self.close()
+            raise InvalidHierarchyFile(f"{path} is not a hierarchy file")
+
+        self._n = n
+        self._names_pos = names_pos
+        self._labels_pos = labels_pos
+        self._rows_pos = rows_pos
+
+    def _complete(self, n: int, rows_pos: int) -> bool:
+        """Whether the file ends where its last row does, e.g. not truncated"""
+        rows = rows_pos + UINT.size * (n + 1)
+        if rows > len(self._mm):
+            return False
+        (total,) = UINT.unpack_from(self._mm, rows_pos + UINT.size * n)
+        return rows + UINT.size * total == len(self._mm)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __enter__(self) -> "HierarchyFile":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def _offsets(self, pos: int, i: int) -> Tuple[int, int]:
+        return struct.unpack_from("<II", self._mm, pos + UINT.size * i)
+
+    def _string(self, pos: int, i: int) -> str:
+        start, end = self._offsets(pos, i)
+        blob = pos + UINT.size * (self._n + 1)
+        return self._mm[blob + start : blob + end].decode("utf-8")
+
+    def name(self, i: int) -> str:
+        return self._string(self._names_pos, i)
+
+    def label(self, i: int) -> str:
+        return self._string(self._labels_pos, i)
+
+    def find(self, name: str) -> Optional[int]:
+        """Row of `name`, binary-searching the sorted names"""
+        low, high = 0, self._n
+        while low < high:
+            middle = (low + high) // 2
+            if self.name(middle) < name:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < self._n and self.name(low) == name:
+            return low
+        return None
+
+    def subsumers(self, i: int) -> List[int]:
+        start, end = self._offsets(self._rows_pos, i)
+        data = self._rows_pos + UINT.size * (self._n + 1)
+        return list(
+            struct.unpack_from(f"<{end - start}I", self._mm, data + UINT.size * start)
+        )
+
+    def get_subsumers(self, name: str) -> Optional[List[str]]:
+        """Labels of the subsumers of `name`, `None` if it is not a class"""
+        i = self.find(name)
+        if i is None:
+            return None
+        return [self.label(j) for j in self.subsumers(i)]
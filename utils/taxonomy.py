@@ -0,0 +1,149 @@
+"""
+Compact taxonomy built from a classified hierarchy.
+
+Instead of the full set of subsumers per concept, only the direct
+edges are kept (transitive reduction), between classes of equivalent
+concepts. Queries walk those edges, so they cost in proportion to
+their answer instead of scanning the hierarchy.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Set, Tuple
+
+from utils.terms import TermId
+
+Node = int
+
+
+class Taxonomy:
+    """
+    DAG of the classes of equivalent concept names.
+
+    For a node `n`:
+        - `members[n]` are the equivalent concepts of the class
+        - `parents[n]` and `children[n]` are its direct subsumers and
+        direct subsumees (the reverse index of `parents`)
+        - `rank[n]` is its number of strict subsumers, so ancestors
+        always have a lower rank than their descendants
+    """
+
+    members: List[FrozenSet[TermId]]
+    node_of: Dict[TermId, Node]
+    parents: List[Tuple[Node, ...]]
+    children: List[Tuple[Node, ...]]
+    rank: List[int]
+
+    def __init__(
+        self,
+        hierarchy: Mapping[TermId, Set[TermId]],
+        concepts: Iterable[TermId],
+    ) -> None:
+        """`hierarchy` must be closed, as after `ELReasoner.classify`"""
+        self.members = []
+        self.node_of = {}
+
+        # equivalent concepts have the same set of subsumers
+        nodes_by_row: Dict[FrozenSet[TermId], Node] = {}
+        rows: List[FrozenSet[TermId]] = []
+        for concept in concepts:
+            row = frozenset(hierarchy[concept])
+            node = nodes_by_row.get(row)
+            if node is None:
+                node = nodes_by_row[row] = len(rows)
+                rows.append(row)
+                self.members.append(frozenset())
+            self.members[node] |= {concept}
+            self.node_of[concept] = node
+
+        strict = [
+            set(self.node_of[s] for s in row if s in self.node_of) - {node}
+            for node, row in enumerate(rows)
+        ]
+        self.rank = [len(subsumers) for subsumers in strict]
+
+        # transitive reduction: the most specific subsumers come first,
+        # anything above a direct parent is not direct
+        parents = []
+        children: List[List[Node]] = [[] for _ in rows]
+        for node, subsumers in enumerate(strict):
+            direct = []
+            covered = set()
+            for subsumer in sorted(subsumers, key=self.rank.__getitem__, reverse=True):
+                if subsumer in covered:
+                    continue
+                direct.append(subsumer)
+                covered |= strict[subsumer]
+                children[subsumer].append(node)
+            parents.append(tuple(direct))
+
+        self.parents = parents
+        self.children = [tuple(c) for c in children]
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def _concepts(self, nodes: Iterable[Node]) -> Set[TermId]:
+        return set(concept for node in nodes for concept in self.members[node])
+
+    def _reach(self, node: Node, edges: List[Tuple[Node, ...]]) -> Set[Node]:
+        reached = {node}
+        stack = [node]
+        while stack:
+            for other in edges[stack.pop()]:
+                if other not in reached:
+                    reached.add(other)
+                    stack.append(other)
+        return reached
+
+    def equivalents(self, concept: TermId) -> FrozenSet[TermId]:
+        return self.members[self.node_of[concept]]
+
+    def direct_subsumers(self, concept: TermId) -> Set[TermId]:
+        return self._concepts(self.parents[self.node_of[concept]])
+
+    def direct_subsumees(self, concept: TermId) -> Set[TermId]:
+        return self._concepts(self.children[self.node_of[concept]])
+
+    def subsumers(self, concept: TermId) -> Set[TermId]:
+        """All subsumers, equivalent concepts included"""
+        return self._concepts(self._reach(self.node_of[concept], self.parents))
+
+    def subsumees(self, concept: TermId) -> Set[TermId]:
+        """All subsumees, equivalent concepts included"""
+        return self._concepts(self._reach(self.node_of[concept], self.children))
+
+    def is_subsumed_by(self, subsumee: TermId, subsumer: TermId) -> bool:
+        """Walks up from `subsumee`, never past the rank of `subsumer`"""
+        start, goal = self.node_of[subsumee], self.node_of[subsumer]
+        if start == goal:
+            return True
+
+        goal_rank = self.rank[goal]
+        reached = {start}
+        stack = [start]
+        while stack:
+            for parent in self.parents[stack.pop()]:
+                if parent == goal:
+                    return True
+                if parent not in reached and self.rank[parent] > goal_rank:
+                    reached.add(parent)
+                    stack.append(parent)
+
+        return False
+
+    def least_common_subsumers(
+        self,
+        first: TermId,
+        second: TermId,
+    ) -> List[FrozenSet[TermId]]:
+        """Classes of the most specific named concepts subsuming both,
+        empty if only ⊤ does
+        """
+        common = self._reach(self.node_of[first], self.parents) & self._reach(
+            self.node_of[second], self.parents
+        )
+        # minimal ones: no direct subsumee of theirs is common as well
+        return [
+            self.members[node]
+            for node in sorted(common)
+            if not any(child in common for child in self.children[node])
+        ]
@@ -1,56 +1,350 @@
-"""One problem with the tbox coming from dl4python
-are equivalence axioms, which should be converted to
-conjunctions to deal with them.
+"""
+The TBox is normalized before reasoning. Equivalences are split into
+GCIs both ways, and every GCI is rewritten into the four EL normal forms,
+over atoms (concept names, fresh names and ⊤):
 
-This is done normalizing the tbox.
+    A ⊑ B        A1 ⊓ A2 ⊑ B        A ⊑ ∃r.B        ∃r.A ⊑ B
 
-Question is, should we take into account other things 
-when normalizing the tbox coming from dl4python? 
+Complex concepts nested in a GCI are replaced by a fresh name standing
+for them, so the completion rules only ever match small axioms, and the
+only input concepts they need are the ones of the normalized axioms.
 """
-from copy import copy
-from typing import Set, Tuple
 
-from utils.models import Axiom, AxiomType, ELFactory
+from collections import defaultdict, deque
+from typing import DefaultDict, Dict, FrozenSet, Iterable, List, Set
+
+from utils.graph import strongly_connected_components
+from utils.models import ConceptType
+from utils.terms import GCI, TOP, Equivalence, TermId, TermTable
+
+# how many goals `TBox.antecedents` remembers
+ANTECEDENTS_CACHE = 1024
+# and how many antecedents it collects at most for each
+ANTECEDENTS_LIMIT = 64
+
+
+class Normalizer:
+    """
+    Rewrites GCIs into normal form, collected in `normalized`.
+
+    `lhs_atom(C)` is an atom A with C ⊑ A, `rhs_atom(C)` one with A ⊑ C,
+    both the fresh name of C if it is complex, with the normalized GCIs
+    that make it so. They are memoized, and sub-concepts are always done
+    before the concepts made of them (in order of ID), so the recursion
+    never goes deeper than one level however nested the concepts are.
+    """
+
+    terms: TermTable
+    normalized: Set[GCI]
+
+    _lhs_atoms: Dict[TermId, TermId]
+    _rhs_atoms: Dict[TermId, TermId]
+
+    def __init__(self, terms: TermTable) -> None:
+        self.terms = terms
+        self.normalized = set()
+        self._lhs_atoms = {}
+        self._rhs_atoms = {}
+
+    def is_atom(self, concept: TermId) -> bool:
+        return self.terms.kinds[concept] in (ConceptType.NAME, ConceptType.TOP)
+
+    def lhs_form(self, concept: TermId) -> TermId:
+        """`concept` as the left-hand side of a normalized GCI:
+        an atom, A1 ⊓ A2 or ∃r.A
+        """
+        terms = self.terms
+        kind = terms.kinds[concept]
+
+        if kind is ConceptType.CONJUNCTION:
+            atoms = list(
+                dict.fromkeys(self.lhs_atom(c) for c in terms.conjuncts[concept])
+            )
+            # wider conjunctions are chained, through fresh names as well
+            conjunction = atoms[0]
+            for atom in atoms[1:]:
+                if not self.is_atom(conjunction):
+                    conjunction = self.lhs_atom(conjunction)
+                conjunction = terms.add_conjunction(conjunction, atom)
+            return conjunction
+
+        if kind is ConceptType.EXISTENTIAL:
+            return terms.add_existential(
+                terms.roles[concept], self.lhs_atom(terms.fillers[concept])
+            )
+
+        return concept
+
+    def lhs_atom(self, concept: TermId) -> TermId:
+        atom = self._lhs_atoms.get(concept)
+        if atom is not None:
+            return atom
+
+        if self.is_atom(concept):
+            atom = concept
+        else:
+            atom = self.terms.add_fresh_name(concept)
+            self.normalized.add((self.lhs_form(concept), atom))
 
-el_factory = ELFactory()
+        self._lhs_atoms[concept] = atom
+        return atom
+
+    def rhs_atom(self, concept: TermId) -> TermId:
+        atom = self._rhs_atoms.get(concept)
+        if atom is not None:
+            return atom
+
+        if self.is_atom(concept):
+            atom = concept
+        else:
+            atom = self.terms.add_fresh_name(concept)
+            self.split(atom, concept)
+
+        self._rhs_atoms[concept] = atom
+        return atom
+
+    def split(self, lhs: TermId, rhs: TermId) -> None:
+        """Normalized GCIs for `lhs` ⊑ `rhs`, one per conjunct of `rhs`"""
+        terms = self.terms
+
+        pending = [rhs]
+        while pending:
+            concept = pending.pop()
+            kind = terms.kinds[concept]
+
+            if kind is ConceptType.CONJUNCTION:
+                pending.extend(terms.conjuncts[concept])
+            elif kind is ConceptType.EXISTENTIAL:
+                # only an atom can have an existential on the right
+                self.add(
+                    self.lhs_atom(lhs),
+                    terms.add_existential(
+                        terms.roles[concept], self.rhs_atom(terms.fillers[concept])
+                    ),
+                )
+            else:
+                self.add(self.lhs_form(lhs), concept)
+
+    def add(self, lhs: TermId, rhs: TermId) -> None:
+        if lhs != rhs and rhs != TOP:
+            self.normalized.add((lhs, rhs))
+
+    def _pending(
+        self,
+        concept: TermId,
+        done: Dict[TermId, TermId],
+        fillers_only: bool = False,
+    ) -> List[TermId]:
+        """Sub-concepts of `concept` not `done` yet, without looking into
+        the ones that are. With `fillers_only`, only the fillers of
+        existentials are returned.
+        """
+        terms = self.terms
+
+        pending = set()
+        seen = {concept}
+        stack = [concept]
+        while stack:
+            term = stack.pop()
+            filler = terms.fillers[term]
+            for child in terms.conjuncts[term] if filler is None else (filler,):
+                if child in seen or child in done:
+                    continue
+                seen.add(child)
+                stack.append(child)
+                if filler is not None or not fillers_only:
+                    pending.add(child)
+
+        return sorted(pending)
+
+    def add_gci(self, lhs: TermId, rhs: TermId) -> None:
+        # bottom-up, so the recursion stops at memoized sub-concepts
+        for concept in self._pending(lhs, self._lhs_atoms):
+            self.lhs_atom(concept)
+        for concept in self._pending(rhs, self._rhs_atoms, fillers_only=True):
+            self.rhs_atom(concept)
+
+        self.split(lhs, rhs)
 
 
 class TBox:
-    axioms: Set[Axiom]
-    normalized: Set[Axiom]
+    """
+    Besides the normalized axioms and the concepts they are made of
+    (`signature`), keeps these indexes, built once and rebuilt only when
+    axioms are added or removed:
 
-    def __init__(self, axioms: Set[Axiom]) -> None:
-        self.axioms = axioms
-        self.normalized = self.get_normalized_axioms()
+        - `index`: left-hand side -> right-hand sides of the normalized GCIs
 
-    def resolve_equivalence(self, equivalence: Axiom) -> Set[Axiom]:
-        A, B = equivalence.get_concepts()
-        return {el_factory.get_gci(A, B), el_factory.get_gci(B, A)}
+        - `told`: reflexive-transitive closure of `index`, i.e. all the
+        told superclasses reached following chains of GCIs, so the ⊑-rule
+        needs a single lookup per concept
 
-    def resolve_gci(self, gci: Axiom) -> Set[Axiom]:
-        """Should one deal with more stuff in the TBox ?"""
-        raise NotImplementedError
+        - `inverse`: `index` the other way around, right-hand side ->
+        left-hand sides, to go from a goal back to what can derive it
+        (see `antecedents`)
+    """
 
-    def _normalize_axioms(
+    terms: TermTable
+    gcis: Set[GCI]
+    equivalences: Set[Equivalence]
+    normalized: Set[GCI]
+    signature: Set[TermId]
+
+    index: DefaultDict[TermId, Set[TermId]]
+    told: Dict[TermId, FrozenSet[TermId]]
+    inverse: DefaultDict[TermId, Set[TermId]]
+
+    _antecedents: Dict[TermId, FrozenSet[TermId]]
+
+    def __init__(self, terms: TermTable) -> None:
+        self.terms = terms
+        self.gcis = set(terms.gcis)
+        self.equivalences = set(map(self.canonical, terms.equivalences))
+        self.refresh()
+
+    def refresh(self) -> None:
+        self.normalized = self.get_normalized_axioms()
+        self.signature = self.get_signature()
+        self.index = self.get_index()
+        self.told = self.get_told_closure()
+        self.inverse = self.get_inverse_index()
+        self._antecedents = {}
+
+    def add_axioms(
         self,
-        axioms: Set[Axiom],
-    ) -> Tuple[Set[Axiom], bool]:
-        normalized = set()
-        terminate = True
-
-        for axiom in axioms:
-            if axiom.type == AxiomType.EQUIVALENCE.value:
-                normalized |= self.resolve_equivalence(axiom)
-                terminate = False
-            else:
-                normalized.add(axiom)
+        gcis: Iterable[GCI] = (),
+        equivalences: Iterable[Equivalence] = (),
+    ) -> Set[GCI]:
+        """Returns the normalized GCIs that are new"""
+        before = self.normalized
+        self.gcis |= set(gcis)
+        self.equivalences |= set(map(self.canonical, equivalences))
+        self.refresh()
+        return self.normalized - before
+
+    def remove_axioms(
+        self,
+        gcis: Iterable[GCI] = (),
+        equivalences: Iterable[Equivalence] = (),
+    ) -> Set[GCI]:
+        """Returns the normalized GCIs that are gone"""
+        before = self.normalized
+        self.gcis -= set(gcis)
+        self.equivalences -= set(map(self.canonical, equivalences))
+        self.refresh()
+        return before - self.normalized
+
+    @staticmethod
+    def canonical(equivalence: Equivalence) -> Equivalence:
+        """The same equivalence whatever the order of its concepts"""
+        return tuple(sorted(set(equivalence)))
+
+    def resolve_equivalence(self, equivalence: Equivalence) -> Set[GCI]:
+        return set((A, B) for A in equivalence for B in equivalence if A != B)
+
+    def resolve_gci(self, gci: GCI) -> Set[GCI]:
+        """The normalized GCIs of `gci`, see `Normalizer`"""
+        normalizer = Normalizer(self.terms)
+        normalizer.add_gci(*gci)
+        return normalizer.normalized
+
+    def get_normalized_axioms(self) -> Set[GCI]:
+        # one normalizer for all, so shared sub-concepts are done once
+        normalizer = Normalizer(self.terms)
+
+        gcis: List[GCI] = list(self.gcis)
+        for equivalence in self.equivalences:
+            gcis.extend(self.resolve_equivalence(equivalence))
+
+        # in a fixed order, fresh names get the same IDs every time
+        for gci in sorted(gcis):
+            normalizer.add_gci(*gci)
+
+        return normalizer.normalized
+
+    def get_signature(self) -> Set[TermId]:
+        signature = set()
+        for gci in self.normalized:
+            for concept in gci:
+                signature |= self.terms.subterms(concept)
+        return signature
+
+    def get_index(self) -> DefaultDict[TermId, Set[TermId]]:
+        index = defaultdict(set)
+
+        for lhs, rhs in self.normalized:
+            index[lhs].add(rhs)
+
+        return index
+
+    def get_inverse_index(self) -> DefaultDict[TermId, Set[TermId]]:
+        inverse = defaultdict(set)
+
+        for lhs, rhs in self.normalized:
+            inverse[rhs].add(lhs)
+
+        return inverse
+
+    def get_told_closure(self) -> Dict[TermId, FrozenSet[TermId]]:
+        """Concepts in a cycle of GCIs are equivalent, so each strongly
+        connected component is collapsed and shares one closure. Components
+        come in reverse topological order, so a single pass propagates them.
+        """
+        components = strongly_connected_components(
+            list(self.index), lambda concept: self.index.get(concept, ())
+        )
+
+        told = {}
+        for component in components:
+            reached = set(component)
+            for concept in component:
+                for rhs in self.index.get(concept, ()):
+                    if rhs not in reached:
+                        reached |= told[rhs]
+
+            closure = frozenset(reached)
+            for concept in component:
+                told[concept] = closure
+
+        return told
+
+    def superclasses(self, concept: TermId) -> FrozenSet[TermId]:
+        """All told superclasses of `concept`, itself included"""
+        return self.told.get(concept, frozenset((concept,)))
+
+    def antecedents(self, goal: TermId) -> FrozenSet[TermId]:
+        """Concepts that can lead an individual to `goal`, following the
+        rules backwards: the left-hand sides of GCIs (`inverse`), the
+        conjuncts of a conjunction (⊓-rule 2) and the filler of an
+        existential (∃-rule 2, in a successor). `goal` included.
+
+        Only a hint of what to derive first: the closest ones, breadth
+        first, up to `ANTECEDENTS_LIMIT` of them, remembered for the last
+        `ANTECEDENTS_CACHE` goals.
+        """
+        antecedents = self._antecedents.get(goal)
+        if antecedents is not None:
+            return antecedents
 
-        return normalized, terminate
+        terms = self.terms
+        reached = {goal}
+        pending = deque([goal])
+        while pending and len(reached) < ANTECEDENTS_LIMIT:
+            concept = pending.popleft()
+            previous = list(self.inverse.get(concept, ()))
+            kind = terms.kinds[concept]
+            if kind is ConceptType.CONJUNCTION:
+                previous.extend(terms.conjuncts[concept])
+            elif kind is ConceptType.EXISTENTIAL:
+                previous.append(terms.fillers[concept])
 
-    def get_normalized_axioms(self) -> Set[Axiom]:
-        terminate = False
-        axioms = copy(self.axioms)
-        while not terminate:
-            axioms, terminate = self._normalize_axioms(axioms)
+            for antecedent in previous:
+                if antecedent not in reached:
+                    reached.add(antecedent)
+                    pending.append(antecedent)
 
-        return axioms
+        if len(self._antecedents) >= ANTECEDENTS_CACHE:
+            # oldest goal first
+            del self._antecedents[next(iter(self._antecedents))]
+        antecedents = self._antecedents[goal] = frozenset(reached)
+        return antecedents
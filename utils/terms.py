@@ -0,0 +1,285 @@
+"""
+Python-side snapshot of the concepts and axioms of an ontology.
+
+Every concept gets a small integer ID with its structure (kind,
+conjuncts, role and filler) stored in plain Python lists, so the
+reasoning loop never has to go over the gateway. Roles get their
+own IDs as well.
+
+The Java objects are only kept in `sources` to translate IDs
+back to strings for output.
+"""
+
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from utils.models import Axiom, AxiomType, Concept, ConceptType, CountedAxiom
+
+TermId = int
+RoleId = int
+
+GCI = Tuple[TermId, TermId]
+Equivalence = Tuple[TermId, ...]
+
+# ⊤ is always interned first
+TOP: TermId = 0
+
+
+class TermTable:
+    """
+    Interned table of concepts.
+
+    For a concept with ID `c`:
+        - `kinds[c]` is its `ConceptType`
+        - `names[c]` is its name if it is a concept name
+        - `conjuncts[c]` are the IDs of its conjuncts if it is a conjunction
+        - `roles[c]` and `fillers[c]` are the role ID and filler ID if it is
+        an existential role restriction
+
+    Terms are hash-consed: interning the same structure twice returns
+    the same ID. Sub-concepts are always interned before the concepts
+    made of them, so they have lower IDs.
+
+    `fresh` are the names introduced by normalizing the TBox, one per
+    complex concept they stand for. They are not in `concept_names`.
+    """
+
+    kinds: List[ConceptType]
+    names: List[Optional[str]]
+    conjuncts: List[Tuple[TermId, ...]]
+    roles: List[Optional[RoleId]]
+    fillers: List[Optional[TermId]]
+
+    role_names: List[str]
+
+    gcis: List[GCI]
+    equivalences: List[Equivalence]
+
+    fresh: Set[TermId]
+
+    sources: Dict[TermId, Concept]
+
+    _ids: Dict[Hashable, TermId]
+    _role_ids: Dict[str, RoleId]
+
+    def __init__(self) -> None:
+        self.kinds = []
+        self.names = []
+        self.conjuncts = []
+        self.roles = []
+        self.fillers = []
+        self.role_names = []
+        self.gcis = []
+        self.equivalences = []
+        self.fresh = set()
+        self.sources = {}
+        self._ids = {}
+        self._role_ids = {}
+
+        self._intern(("top",), ConceptType.TOP)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def concept_names(self) -> Set[TermId]:
+        return set(
+            c
+            for c in range(len(self))
+            if self.kinds[c] is ConceptType.NAME and c not in self.fresh
+        )
+
+    def _intern(
+        self,
+        key: Hashable,
+        kind: ConceptType,
+        name: Optional[str] = None,
+        conjuncts: Tuple[TermId, ...] = (),
+        role: Optional[RoleId] = None,
+        filler: Optional[TermId] = None,
+    ) -> TermId:
+        term = self._ids.get(key)
+        if term is not None:
+            return term
+
+        term = len(self.kinds)
+        self._ids[key] = term
+        self.kinds.append(kind)
+        self.names.append(name)
+        self.conjuncts.append(conjuncts)
+        self.roles.append(role)
+        self.fillers.append(filler)
+        return term
+
+    def add_role(self, name: str) -> RoleId:
+        role = self._role_ids.get(name)
+        if role is None:
+            role = self._role_ids[name] = len(self.role_names)
+            self.role_names.append(name)
+        return role
+
+    def add_name(self, name: str) -> TermId:
+        return self._intern(("name", name), ConceptType.NAME, name=name)
+
+    def add_fresh_name(self, concept: TermId) -> TermId:
+        """The fresh name standing for `concept`, always the same one"""
+        fresh = self._intern(("fresh", concept), ConceptType.NAME, name=f"_:{concept}")
+        self.fresh.add(fresh)
+        return fresh
+
+    def add_conjunction(self, *conjuncts: TermId) -> TermId:
+        return self._intern(
+            ("and", frozenset(conjuncts)),
+            ConceptType.CONJUNCTION,
+            conjuncts=tuple(conjuncts),
+        )
+
+    def add_existential(self, role: RoleId, filler: TermId) -> TermId:
+        return self._intern(
+            ("some", role, filler),
+            ConceptType.EXISTENTIAL,
+            role=role,
+            filler=filler,
+        )
+
+    def add_gci(self, lhs: TermId, rhs: TermId) -> None:
+        self.gcis.append((lhs, rhs))
+
+    def add_equivalence(self, *concepts: TermId) -> None:
+        self.equivalences.append(tuple(concepts))
+
+    def get_name(self, name: str) -> Optional[TermId]:
+        return self._ids.get(("name", name))
+
+    def subterms(self, concept: TermId) -> Set[TermId]:
+        """`concept` and all the concepts it is made of"""
+        subterms = {concept}
+        stack = [concept]
+        while stack:
+            term = stack.pop()
+            children = self.conjuncts[term]
+            if self.fillers[term] is not None:
+                children = (self.fillers[term],)
+            for child in children:
+                if child not in subterms:
+                    subterms.add(child)
+                    stack.append(child)
+        return subterms
+
+    def binarize(self, concept: TermId) -> TermId:
+        """`concept` with its conjunctions nested two conjuncts at a time,
+        e.g. (A ⊓ B) ⊓ C for A ⊓ B ⊓ C, since ⊓-rule 2 only builds binary
+        conjunctions. Concepts that are binary already are returned as is.
+        """
+        binary = {}
+        # sub-concepts always have lower IDs
+        for term in sorted(self.subterms(concept)):
+            kind = self.kinds[term]
+            if kind is ConceptType.CONJUNCTION:
+                conjuncts = list(dict.fromkeys(binary[c] for c in self.conjuncts[term]))
+                result = conjuncts[0]
+                for conjunct in conjuncts[1:]:
+                    result = self.add_conjunction(result, conjunct)
+            elif kind is ConceptType.EXISTENTIAL:
+                result = self.add_existential(
+                    self.roles[term], binary[self.fillers[term]]
+                )
+            else:
+                result = term
+            binary[term] = result
+
+        return binary[concept]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Java objects can't leave this process, e.g. to worker processes
+        state = self.__dict__.copy()
+        state["sources"] = {}
+        return state
+
+    def format(self, term: TermId) -> str:
+        """Translate back to a string, through the Java formatter if the
+        term comes from a Java object
+        """
+        if term in self.sources:
+            return str(self.sources[term])
+
+        kind = self.kinds[term]
+        if kind is ConceptType.NAME:
+            return self.names[term]
+        if kind is ConceptType.TOP:
+            return "⊤"
+        if kind is ConceptType.CONJUNCTION:
+            return f"({' ⊓ '.join(self.format(c) for c in self.conjuncts[term])})"
+        role = self.role_names[self.roles[term]]
+        return f"∃{role}.{self.format(self.fillers[term])}"
+
+    def format_all(self, terms: Iterable[TermId]) -> List[str]:
+        return [self.format(term) for term in terms]
+
+    @classmethod
+    def from_ontology(cls, ontology: Any, count_calls: bool = False) -> "TermTable":
+        """One-time snapshot of the sub-concepts and axioms of
+        an ontology coming from dl4python, with `count_calls` its calls
+        over the gateway are counted in `Counted.calls`
+        """
+        return _JavaSnapshot(cls(), CountedAxiom if count_calls else Axiom).run(
+            ontology
+        )
+
+
+class _JavaSnapshot:
+    """Walks the Java objects once, memoizing by Java object so
+    shared sub-concepts only go over the gateway once
+    """
+
+    terms: TermTable
+    axiom: type[Axiom]
+    _seen: Dict[Concept, TermId]
+
+    def __init__(self, terms: TermTable, axiom: type[Axiom] = Axiom) -> None:
+        self.terms = terms
+        self.axiom = axiom
+        self._seen = {}
+
+    def concept(self, concept: Concept) -> TermId:
+        term = self._seen.get(concept)
+        if term is not None:
+            return term
+
+        kind = concept.type
+        if kind == ConceptType.TOP.value:
+            term = TOP
+        elif kind == ConceptType.NAME.value:
+            term = self.terms.add_name(concept._expr.name())
+        elif kind == ConceptType.CONJUNCTION.value:
+            term = self.terms.add_conjunction(
+                *(self.concept(c) for c in concept.conjuncts)
+            )
+        elif kind == ConceptType.EXISTENTIAL.value:
+            term = self.terms.add_existential(
+                self.terms.add_role(concept.role._expr.name()),
+                self.concept(concept.filler),
+            )
+        else:
+            raise ValueError(f"Unsupported concept type {kind}")
+
+        self._seen[concept] = term
+        self.terms.sources.setdefault(term, concept)
+        return term
+
+    def run(self, ontology: Any) -> TermTable:
+        for concept in ontology.getSubConcepts():
+            self.concept(self.axiom.concept(concept))
+
+        for concept in ontology.getConceptNames():
+            self.concept(self.axiom.concept(concept))
+
+        for expr in ontology.tbox().getAxioms():
+            axiom = self.axiom(expr)
+            if axiom.type == AxiomType.GCI.value:
+                self.terms.add_gci(self.concept(axiom.lhs), self.concept(axiom.rhs))
+            elif axiom.type == AxiomType.EQUIVALENCE.value:
+                self.terms.add_equivalence(
+                    *(self.concept(c) for c in axiom.get_concepts())
+                )
+
+        return self.terms
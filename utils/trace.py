@@ -0,0 +1,253 @@
+"""
+Structured tracing of what the models derive.
+
+Events are tuples of IDs, formatted only when something reads them:
+
+    - the state of a model (labels and successors of its individuals)
+    goes to the log, and only if the logger is enabled for the level
+    of the `Tracer`
+
+    - derivations (which fact gave which) are recorded in memory and/or
+    in a compact binary event log, which can be replayed offline with
+    the term table of the same ontology:
+
+        $ python3 -m utils.trace derivations.elt dutch-pancakes.owx
+
+Derivations are only emitted by models built as `TracedModel`, which
+they are not without a `Tracer` or with its categories off, so the
+rules pay nothing for it then.
+
+Binary layout: MAGIC, the fingerprint of the ontology and of how it was
+loaded (see `utils.store.fingerprint`, 64 hex digits, zeros if unknown),
+then one little-endian record per event (kind: uint8, then four uint32,
+`NONE` where not used). IDs only make sense for the same ontology loaded
+the same way, so replaying checks the fingerprint.
+"""
+
+import logging
+import struct
+from enum import IntEnum, IntFlag, auto
+from typing import Any, BinaryIO, Callable, Iterator, List, NamedTuple, Optional
+
+from utils.terms import TermTable
+
+MAGIC = b"ELT\x02"
+
+FINGERPRINT_SIZE = 64
+
+RECORD = struct.Struct("<BIIII")
+
+NONE = 0xFFFFFFFF
+
+
+class Category(IntFlag):
+    # labels and successors of all the individuals, to the log
+    STATE = auto()
+    # every fact derived and the fact that fired the rule
+    DERIVATION = auto()
+
+
+class EventKind(IntEnum):
+    # individual `a` is created, `b` is 1 if taken saturated from the cache
+    INDIVIDUAL = 1
+    # individual `a` gets concept `b`, from individual `c` having concept `d`
+    CONCEPT = 2
+    # individual `a` gets the `b`-successor `c`, from having concept `d`
+    SUCCESSOR = 3
+    # a new model, for `a` ⊑ `b` (`NONE` when classifying)
+    MODEL = 4
+
+
+class Event(NamedTuple):
+    kind: EventKind
+    a: int
+    b: int
+    c: int
+    d: int
+
+
+class Lazy:
+    """`fn(*args)` is only called if the log record is emitted,
+    e.g. `log.info("Subsumers of %s", Lazy(terms.format, c))`
+    """
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn: Callable[..., Any], *args: Any) -> None:
+        self.fn = fn
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.fn(*self.args))
+
+
+class Tracer:
+    """
+    - `categories` are the kinds of events traced
+    - `level` is the logging level state events are logged at
+    - `events` has the derivation events, with `record`
+    - derivation events are also written to `path`, if given, along
+    with the `ontology` fingerprint
+    """
+
+    categories: Category
+    level: int
+    events: Optional[List[Event]]
+    _file: Optional[BinaryIO]
+
+    def __init__(
+        self,
+        categories: Category = Category.STATE,
+        level: int = logging.DEBUG,
+        path: Optional[str] = None,
+        record: bool = False,
+        ontology: Optional[str] = None,
+    ) -> None:
+        self.categories = categories
+        self.level = level
+        self.events = [] if record else None
+        self._file = None
+
+        if path is not None:
+            self._file = open(path, "wb")
+            self._file.write(MAGIC)
+            self._file.write((ontology or "0" * FINGERPRINT_SIZE).encode("ascii"))
+
+    def __enter__(self) -> "Tracer":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def traces(self, category: Category) -> bool:
+        return bool(self.categories & category)
+
+    def logs(self, category: Category, logger: logging.Logger) -> bool:
+        """Whether events of `category` would end up in `logger`"""
+        return self.traces(category) and logger.isEnabledFor(self.level)
+
+    def emit(
+        self,
+        kind: EventKind,
+        a: int,
+        b: int,
+        c: int = NONE,
+        d: int = NONE,
+    ) -> None:
+        if self.events is not None:
+            self.events.append(Event(kind, a, b, c, d))
+        if self._file is not None:
+            self._file.write(RECORD.pack(kind, a, b, c, d))
+
+
+def _read_header(f: BinaryIO, path: str) -> Optional[str]:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{path} is not an event log")
+
+    fingerprint = f.read(FINGERPRINT_SIZE).decode("ascii")
+    return None if fingerprint == "0" * FINGERPRINT_SIZE else fingerprint
+
+
+def read_fingerprint(path: str) -> Optional[str]:
+    """Fingerprint of the ontology a log was recorded for, if known"""
+    with open(path, "rb") as f:
+        return _read_header(f, path)
+
+
+def read_events(path: str) -> Iterator[Event]:
+    with open(path, "rb") as f:
+        _read_header(f, path)
+
+        while record := f.read(RECORD.size):
+            kind, *fields = RECORD.unpack(record)
+            yield Event(EventKind(kind), *fields)
+
+
+def format_event(event: Event, terms: TermTable) -> str:
+    kind, a, b, c, d = event
+
+    def fmt(term: int) -> str:
+        return "-" if term == NONE else terms.format(term)
+
+    if kind is EventKind.MODEL:
+        if a == NONE:
+            return "model for classification"
+        return f"model for {fmt(a)} ⊑ {fmt(b)}"
+
+    if kind is EventKind.INDIVIDUAL:
+        cached = " (saturated, from the cache)" if b else ""
+        return f"individual {fmt(a)}{cached}"
+
+    if kind is EventKind.CONCEPT:
+        return f"[{fmt(a)}] + {fmt(b)}    from [{fmt(c)}] {fmt(d)}"
+
+    return f"[{fmt(a)}] --{terms.role_names[b]}--> [{fmt(c)}]    from {fmt(d)}"
+
+
+def replay(
+    path: str,
+    terms: TermTable,
+    fingerprint: Optional[str] = None,
+) -> Iterator[str]:
+    """Events of a binary log as text, `terms` must come from
+    the same ontology the log was recorded for, with its TBox
+    normalized so the fresh names are there (see `utils.tbox`)
+
+    With the `fingerprint` of that ontology, logs recorded for
+    another one are refused instead of printing the wrong names
+    """
+    recorded = read_fingerprint(path)
+    if fingerprint is not None and recorded is not None and fingerprint != recorded:
+        raise ValueError(
+            f"{path} was recorded for another ontology, "
+            "or one loaded another way (with or without --gateway)"
+        )
+
+    for event in read_events(path):
+        yield format_event(event, terms)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from utils.owl import NotOWLXML, load_owx
+    from utils.store import fingerprint
+    from utils.tbox import TBox
+
+    parser = argparse.ArgumentParser(description="Replay a derivation trace")
+    parser.add_argument("trace", help="event log written with --trace")
+    parser.add_argument("file_name", help="ontology the trace was recorded for")
+    parser.add_argument(
+        "--gateway",
+        action="store_true",
+        help="load the ontology through the dl4python Java gateway, "
+        "as it was when recording",
+    )
+    args = parser.parse_args()
+
+    if args.gateway:
+        from main import load_ontology
+
+        terms = TermTable.from_ontology(
+            load_ontology(args.file_name, True, logging.getLogger(__name__))
+        )
+    else:
+        try:
+            terms = load_owx(args.file_name)
+        except NotOWLXML as e:
+            sys.exit(f"error: {e}")
+    # fresh names get the same IDs as when recording, see `TBox`
+    TBox(terms)
+
+    key = fingerprint(args.file_name, "gateway" if args.gateway else "owx")
+    try:
+        for line in replay(args.trace, terms, key):
+            print(line)
+    except ValueError as e:
+        sys.exit(f"error: {e}")